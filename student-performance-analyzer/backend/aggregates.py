@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+"""Materialized per-student aggregates over the questions table.
+
+Usage:
+    python aggregates.py rebuild --db student.db
+    python aggregates.py check --db student.db
+"""
+
+import argparse
+import sqlite3
+from typing import List, Optional, Sequence
+
+from sql_analysis import REJECTION_REASONS, SQLAnalyzer, cleaned_cte
+
+# Valid attempts only. Subtopic rows are keyed by topic as well, so both the subtopic and topic
+# tallies (and the first topic seen per subtopic) can be summed from one table.
+AGGREGATE_TABLES = {
+    'student_subtopic_agg': {
+        'keys': ['student_id', 'subtopic', 'topic'],
+        'sums': {
+            'attempts': 'COUNT(*)',
+            'correct': 'SUM(correct)',
+            'time_sum': 'SUM(time_seconds)',
+            'time_incorrect_sum': 'SUM(CASE WHEN correct THEN 0 ELSE time_seconds END)',
+            'difficulty_sum': 'SUM(difficulty)',
+            'high': 'SUM(is_high)',
+        },
+    },
+    'student_difficulty_agg': {
+        'keys': ['student_id', 'difficulty'],
+        'sums': {'attempts': 'COUNT(*)', 'correct': 'SUM(correct)'},
+    },
+    'student_test_agg': {
+        'keys': ['student_id', 'test_id'],
+        'sums': {
+            'attempts': 'COUNT(*)',
+            'correct': 'SUM(correct)',
+            'time_sum': 'SUM(time_seconds)',
+            'hard_attempts': 'SUM(difficulty = 3)',
+            'hard_correct': 'SUM(difficulty = 3 AND correct)',
+        },
+    },
+}
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    for table, spec in AGGREGATE_TABLES.items():
+        columns = [f'{key} NOT NULL' for key in spec['keys']] + [f'{name} INTEGER NOT NULL' for name in spec['sums']]
+        if table == 'student_subtopic_agg':
+            # Earliest questions rowid seen for the (subtopic, topic) pair, which picks the subtopic's
+            # topic label. Adding rows can only lower it; `relabel` resets it when its row moves away.
+            columns.append('first_row INTEGER NOT NULL')
+        conn.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ({", ".join(columns)}, PRIMARY KEY ({", ".join(spec["keys"])}))'
+        )
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS student_rejections (
+            student_id TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            PRIMARY KEY (student_id, reason)
+        )
+    ''')
+    conn.commit()
+
+    # Databases that already hold attempts get their aggregates built once before incremental upkeep
+    has_attempts = conn.execute('SELECT 1 FROM questions LIMIT 1').fetchone() is not None
+    if has_attempts and is_empty(conn):
+        rebuild(conn)
+
+
+def apply(conn: sqlite3.Connection, where: str, params: Sequence = (), sign: int = 1) -> None:
+    """Add (sign=1) or subtract (sign=-1) the questions rows matching `where` from every aggregate.
+
+    The loader subtracts rows it is about to replace and adds them back once written, so the
+    tables stay current without rescanning a student's history. Runs in the caller's transaction.
+    Subtracting queues the keys whose first_row is among the rows; adding dequeues those whose
+    row is back under the same key. The caller runs `relabel` for the rest once rows are written.
+    """
+    # The cleaned rows are staged once and every table is grouped from the staged copy
+    cte, cte_params = cleaned_cte(conn, f"({where}) AND student_id != ''", params)
+    conn.execute('DROP TABLE IF EXISTS temp.applied')
+    conn.execute(f'CREATE TEMP TABLE applied AS {cte} SELECT * FROM cleaned', cte_params)
+
+    for table, spec in AGGREGATE_TABLES.items():
+        keys, sums = spec['keys'], spec['sums']
+        columns = keys + list(sums)
+        selects = keys + [f'? * {expression}' for expression in sums.values()]
+        updates = [f'{name} = {table}.{name} + excluded.{name}' for name in sums]
+        if table == 'student_subtopic_agg':
+            columns.append('first_row')
+            selects.append('MIN(row_order)')
+            updates.append(f'first_row = MIN({table}.first_row, excluded.first_row)')
+        not_null = ' AND '.join(f'{key} IS NOT NULL' for key in keys)
+        # WHERE is required before ON CONFLICT in an INSERT ... SELECT upsert
+        conn.execute(f'''
+            INSERT INTO {table} ({", ".join(columns)})
+            SELECT {", ".join(selects)} FROM temp.applied WHERE rejection IS NULL AND {not_null}
+            GROUP BY {", ".join(keys)}
+            ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {", ".join(updates)}
+        ''', [sign] * len(sums))
+
+    conn.execute('''
+        INSERT INTO student_rejections (student_id, reason, rows)
+        SELECT student_id, rejection, ? * COUNT(*) FROM temp.applied WHERE rejection IS NOT NULL
+        GROUP BY student_id, rejection
+        ON CONFLICT (student_id, reason) DO UPDATE SET rows = student_rejections.rows + excluded.rows
+    ''', [sign])
+    if sign < 0:
+        conn.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS relabel (
+                student_id, subtopic, topic, first_row, PRIMARY KEY (student_id, subtopic, topic)
+            )
+        ''')
+        conn.execute('''
+            INSERT OR IGNORE INTO temp.relabel
+            SELECT agg.student_id, agg.subtopic, agg.topic, agg.first_row
+            FROM temp.applied AS a JOIN student_subtopic_agg AS agg
+              ON agg.student_id = a.student_id AND agg.subtopic = a.subtopic AND agg.topic = a.topic
+             AND agg.first_row = a.row_order
+            WHERE a.rejection IS NULL
+        ''')
+    elif _has_temp_table(conn, 'relabel'):
+        conn.execute('''
+            DELETE FROM temp.relabel WHERE rowid IN (
+                SELECT r.rowid FROM temp.applied AS a JOIN temp.relabel AS r
+                  ON r.student_id = a.student_id AND r.subtopic = a.subtopic AND r.topic = a.topic
+                 AND r.first_row = a.row_order
+                WHERE a.rejection IS NULL
+            )
+        ''')
+    conn.execute('DROP TABLE temp.applied')
+
+    if sign < 0:
+        for table in AGGREGATE_TABLES:
+            conn.execute(f'DELETE FROM {table} WHERE attempts = 0')
+        conn.execute('DELETE FROM student_rejections WHERE rows = 0')
+
+
+def relabel(conn: sqlite3.Connection) -> None:
+    """Reset first_row for subtopic keys whose earliest row was rewritten under another key or
+    became invalid, from the key's current rows; other keys' MIN() upkeep is already exact"""
+    if not _has_temp_table(conn, 'relabel'):
+        return
+    if conn.execute('SELECT 1 FROM temp.relabel LIMIT 1').fetchone() is not None:
+        cte, params = cleaned_cte(conn, '(student_id, subtopic) IN (SELECT student_id, subtopic FROM temp.relabel)')
+        # Keyed, so the UPDATE below looks each label up instead of scanning for it
+        conn.execute('DROP TABLE IF EXISTS temp.first_rows')
+        conn.execute(
+            'CREATE TEMP TABLE first_rows (student_id, subtopic, topic, first_row, PRIMARY KEY (student_id, subtopic, topic))'
+        )
+        conn.execute(f'''
+            INSERT INTO temp.first_rows {cte}
+            SELECT student_id, subtopic, topic, MIN(row_order) FROM valid GROUP BY student_id, subtopic, topic
+        ''', params)
+        conn.execute('''
+            UPDATE student_subtopic_agg SET first_row = (
+                SELECT first_row FROM temp.first_rows AS f
+                WHERE f.student_id = student_subtopic_agg.student_id AND f.subtopic = student_subtopic_agg.subtopic
+                  AND f.topic = student_subtopic_agg.topic
+            )
+            WHERE (student_id, subtopic, topic) IN (SELECT student_id, subtopic, topic FROM temp.relabel)
+        ''')
+        conn.execute('DROP TABLE temp.first_rows')
+    conn.execute('DROP TABLE temp.relabel')
+
+
+def _has_temp_table(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute('SELECT 1 FROM sqlite_temp_master WHERE name = ?', (name,)).fetchone() is not None
+
+
+def rebuild(conn: sqlite3.Connection) -> None:
+    """Recompute every aggregate from the questions table in one transaction"""
+    conn.execute('BEGIN')
+    try:
+        for table in list(AGGREGATE_TABLES) + ['student_rejections']:
+            conn.execute(f'DELETE FROM {table}')
+        apply(conn, '1')
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def drop(conn: sqlite3.Connection) -> None:
+    """Drop every aggregate table; ensure_schema recreates and rebuilds them"""
+    for table in list(AGGREGATE_TABLES) + ['student_rejections']:
+        conn.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def is_empty(conn: sqlite3.Connection) -> bool:
+    return all(
+        conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone() is None
+        for table in ['student_subtopic_agg', 'student_rejections']
+    )
+
+
+def check(conn: sqlite3.Connection, student_ids: Optional[Sequence[str]] = None) -> List[str]:
+    """Students whose materialized tallies differ from a fresh GROUP BY over their questions rows"""
+    if student_ids is None:
+        student_ids = [row[0] for row in conn.execute(
+            "SELECT DISTINCT student_id FROM questions WHERE student_id != '' ORDER BY student_id"
+        )]
+    mismatched = []
+    for student_id in student_ids:
+        stored = MaterializedAnalyzer.for_student(conn, student_id)
+        fresh = SQLAnalyzer.for_student(conn, student_id)
+        if (stored.tallies != fresh.tallies or stored.cleaning_report != fresh.cleaning_report
+                or stored.subtopic_topics != fresh.subtopic_topics):
+            mismatched.append(student_id)
+    return mismatched
+
+
+class MaterializedAnalyzer(SQLAnalyzer):
+    """Student analysis read from the aggregate tables: O(subtopics + tests) rows, not O(attempts)"""
+
+    def __init__(self, conn: sqlite3.Connection, student_id: str):
+        super().__init__(conn, 'student', student_id)
+
+    @classmethod
+    def for_student(cls, conn: sqlite3.Connection, student_id: str) -> 'MaterializedAnalyzer':
+        analyzer = cls(conn, student_id)
+        analyzer.load()
+        return analyzer
+
+    def load(self) -> None:
+        queries = {
+            'overall': '''
+                SELECT 'all', SUM(attempts), SUM(correct), SUM(time_sum),
+                       SUM(time_sum - time_incorrect_sum), SUM(time_incorrect_sum)
+                FROM student_subtopic_agg WHERE student_id = ? HAVING COUNT(*) > 0
+            ''',
+            'difficulties': 'SELECT difficulty, attempts, correct FROM student_difficulty_agg WHERE student_id = ?',
+            'subtopics': '''
+                SELECT subtopic, SUM(attempts), SUM(correct), SUM(time_sum), SUM(time_incorrect_sum),
+                       SUM(difficulty_sum), SUM(high)
+                FROM student_subtopic_agg WHERE student_id = ? GROUP BY subtopic
+            ''',
+            'topics': '''
+                SELECT topic, SUM(attempts), SUM(correct), SUM(difficulty_sum), SUM(high)
+                FROM student_subtopic_agg WHERE student_id = ? GROUP BY topic
+            ''',
+            'tests': '''
+                SELECT test_id, attempts, correct, time_sum, hard_attempts, hard_correct
+                FROM student_test_agg WHERE student_id = ?
+            ''',
+        }
+        for name, query in queries.items():
+            self.tallies[name] = {row[0]: list(row[1:]) for row in self.conn.execute(query, (self.value,))}
+
+        rows = self.conn.execute(
+            'SELECT subtopic, topic, MIN(first_row) FROM student_subtopic_agg WHERE student_id = ? GROUP BY subtopic',
+            (self.value,),
+        )
+        self.subtopic_topics = {subtopic: topic for subtopic, topic, _ in rows}
+        self._match_test_ids()
+
+        counts = dict(self.conn.execute(
+            'SELECT reason, rows FROM student_rejections WHERE student_id = ?', (self.value,)
+        ))
+        rejected = {name: counts.get(name, 0) for name in REJECTION_REASONS}
+        valid_rows = int(self.tallies['overall'].get('all', [0])[0])
+        self.cleaning_report = {
+            'input_rows': valid_rows + sum(rejected.values()),
+            'valid_rows': valid_rows,
+            'rejected': rejected,
+        }
+
+
+if __name__ == '__main__':
+    from db import DB_PATH, connect
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['rebuild', 'check'])
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    ensure_schema(conn)
+    if args.command == 'rebuild':
+        rebuild(conn)
+        print(f"Rebuilt aggregates in {args.db}")
+    else:
+        mismatched = check(conn)
+        print(f"{len(mismatched)} student(s) with stale aggregates" + (f": {', '.join(mismatched)}" if mismatched else ""))
+        conn.close()
+        raise SystemExit(1 if mismatched else 0)
+    conn.close()
@@ -1,6 +1,6 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 class PerformanceAnalyzer:
@@ -18,10 +18,20 @@ class PerformanceAnalyzer:
 
     TEST_ID_COLUMNS = ["test_id", "test", "quiz_id", "attempt_id"]
 
+    # Columns that must be present for an attempt to count, in the order rejections are attributed
+    CLEANING_COLUMNS = ["correct", "time_seconds", "difficulty", "topic", "subtopic"]
+
+    # Memory budget for the cleaned frame, checked by test_memory_budget.py. With bool correctness,
+    # float64 time, int8 difficulty, categorical topic/subtopic/weightage/id columns and a RangeIndex
+    # a cleaned row costs about 16 bytes; the remainder covers category tables for ids.
+    MAX_BYTES_PER_ROW = 32
+
     def __init__(self, df: pd.DataFrame):
-        self.df = df.copy()
+        # Not copied: _normalize_columns projects to a new frame, so the caller's data is never modified
+        self.df = df
         self.analysis_results = {}
         self.column_map = {}
+        self.cleaning_report = {}
     # ...existing code...
 
     def analyze_performance(self):
@@ -89,69 +99,134 @@ class PerformanceAnalyzer:
             "subtopic_ranking": subtopic_ranking,
             "topics": sorted(self.df["topic"].dropna().unique().tolist()),
             "prioritized_topics": self._prioritize_topics(),
+            "data_quality": self.cleaning_report,
         }
 
         return self.analysis_results
 
     def _normalize_columns(self) -> None:
-        lower_map = {col.lower().strip(): col for col in self.df.columns}
-        for canonical, options in self.REQUIRED_COLUMNS.items():
+        self.column_map.update(self.resolve_columns(self.df.columns))
+
+        # Keep only what the analysis reads: question text is validated but never used
+        rename_map = {
+            source: canonical for canonical, source in self.column_map.items()
+            if canonical != "question"
+        }
+        columns = list(rename_map)
+        test_id_col = self.test_id_column(self.df.columns)
+        if test_id_col and test_id_col not in rename_map:
+            columns.append(test_id_col)
+
+        self.df = self.df[columns].rename(columns=rename_map)
+
+    @classmethod
+    def resolve_columns(cls, columns) -> Dict[str, str]:
+        """Canonical name -> raw column for each REQUIRED_COLUMNS entry, matched case-insensitively.
+
+        Raises ValueError naming any required column that is missing (topic_weightage is optional).
+        """
+        lower_map = {col.lower().strip(): col for col in columns}
+        column_map = {}
+        for canonical, options in cls.REQUIRED_COLUMNS.items():
             for option in options:
                 if option in lower_map:
-                    self.column_map[canonical] = lower_map[option]
+                    column_map[canonical] = lower_map[option]
                     break
 
         missing = [
-            key for key in self.REQUIRED_COLUMNS
-            if key not in self.column_map and key != "topic_weightage"
+            key for key in cls.REQUIRED_COLUMNS
+            if key not in column_map and key != "topic_weightage"
         ]
         if missing:
             raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        return column_map
 
-        rename_map = {
-            self.column_map["question"]: "question",
-            self.column_map["correct"]: "correct",
-            self.column_map["time_seconds"]: "time_seconds",
-            self.column_map["topic"]: "topic",
-            self.column_map["subtopic"]: "subtopic",
-            self.column_map["difficulty"]: "difficulty",
-        }
-        if "topic_weightage" in self.column_map:
-            rename_map[self.column_map["topic_weightage"]] = "topic_weightage"
-
-        self.df.rename(columns=rename_map, inplace=True)
+    @classmethod
+    def test_id_column(cls, columns) -> Optional[str]:
+        """The first TEST_ID_COLUMNS name present in `columns`, or None"""
+        return next((col for col in cls.TEST_ID_COLUMNS if col in columns), None)
 
-    def _validate_and_clean_data(self) -> None:
-        self.df["correct"] = self.df["correct"].apply(self._to_bool)
+    def _validate_and_clean_data(self, allow_empty: bool = False) -> None:
+        input_rows = len(self.df)
+        self.df["correct"] = self._normalize_correct(self.df["correct"])
         self.df["time_seconds"] = pd.to_numeric(self.df["time_seconds"], errors="coerce")
-        self.df["difficulty"] = self.df["difficulty"].apply(self._normalize_difficulty)
-        self.df["difficulty"] = pd.to_numeric(self.df["difficulty"], errors="coerce")
+        self.df["difficulty"] = self._normalize_difficulty_column(self.df["difficulty"])
 
         if "topic_weightage" not in self.df.columns:
             self.df["topic_weightage"] = "low"
-        self.df["topic_weightage"] = (
-            self.df["topic_weightage"]
-            .fillna("low")
-            .astype(str)
-            .str.strip()
-            .str.lower()
-        )
-        self.df.loc[~self.df["topic_weightage"].isin(["high", "low"]), "topic_weightage"] = "low"
-
-        self.df = self.df.dropna(subset=["correct", "time_seconds", "difficulty", "topic", "subtopic"])
-        self.df = self.df[self.df["time_seconds"] >= 0]
-        self.df = self.df[self.df["difficulty"].isin([1, 2, 3])]
+        self.df["topic_weightage"] = self._normalize_weightage_column(self.df["topic_weightage"])
+
+        # Single filtering pass; each rejected row is attributed to the first check it fails
+        valid = np.ones(input_rows, dtype=bool)
+        rejected = {}
+        checks = [(f"missing_{column}", self.df[column].isna().to_numpy()) for column in self.CLEANING_COLUMNS]
+        checks.append(("negative_time", (self.df["time_seconds"] < 0).to_numpy()))
+        checks.append(("invalid_difficulty", (~self.df["difficulty"].isin([1, 2, 3])).to_numpy()))
+        for name, failed in checks:
+            rejected[name] = int(np.count_nonzero(failed & valid))
+            valid &= ~failed
+
+        self.df = self.df[valid].reset_index(drop=True)
+        self._compact_dtypes()
+        self.cleaning_report = {
+            "input_rows": input_rows,
+            "valid_rows": int(len(self.df)),
+            "rejected": rejected,
+        }
 
-        if self.df.empty:
+        if self.df.empty and not allow_empty:
             raise ValueError("No valid attempts after cleaning. Check your CSV values.")
 
-    def _to_bool(self, value) -> bool:
+    def _compact_dtypes(self) -> None:
+        """Store cleaned columns in their narrowest types; groupbys on them must pass observed=True"""
+        self.df["difficulty"] = self.df["difficulty"].astype("int8")
+        numeric_columns = {"correct", "time_seconds", "difficulty", "topic_weightage"}
+        for column in self.df.columns:
+            if column not in numeric_columns:
+                # topic, subtopic and id columns repeat heavily, so codes are far smaller than strings
+                self.df[column] = self.df[column].astype("category")
+
+    @staticmethod
+    def _normalize_weightage_column(values: pd.Series) -> pd.Categorical:
+        """Anything other than a "high" spelling (including missing values) is low weightage"""
+        if values.dtype == object:
+            values = values.astype(str)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        is_high = np.array(
+            [not pd.isna(value) and str(value).strip().lower() == "high" for value in uniques],
+            dtype=bool,
+        )
+        return pd.Categorical.from_codes(np.where(is_high[codes], 0, 1), categories=["high", "low"])
+
+    @classmethod
+    def _normalize_correct(cls, values: pd.Series) -> pd.Series:
+        """Vectorized _to_bool: each distinct spelling is parsed once, then broadcast by code"""
+        if pd.api.types.is_bool_dtype(values) and not values.hasnans:
+            return values.astype(bool)
+        if values.dtype == object:
+            # Stringify first so True, 1 and 1.0 stay distinct, exactly as _to_bool sees them
+            values = values.astype(str)
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        mapped = np.array([cls._to_bool(value) for value in uniques], dtype=bool)
+        return pd.Series(mapped[codes], index=values.index)
+
+    @classmethod
+    def _normalize_difficulty_column(cls, values: pd.Series) -> pd.Series:
+        """Vectorized _normalize_difficulty followed by numeric coercion, computed per distinct value"""
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        normalized = pd.Series([cls._normalize_difficulty(value) for value in uniques], dtype=object)
+        numeric = pd.to_numeric(normalized, errors="coerce").to_numpy()
+        return pd.Series(numeric[codes], index=values.index)
+
+    @staticmethod
+    def _to_bool(value) -> bool:
         if isinstance(value, bool):
             return value
         text = str(value).strip().lower()
         return text in {"1", "true", "yes", "y", "correct"}
 
-    def _normalize_difficulty(self, value):
+    @staticmethod
+    def _normalize_difficulty(value):
         if pd.isna(value):
             return None
         text = str(value).strip().lower()
@@ -191,14 +266,19 @@ class PerformanceAnalyzer:
     def _strength_score(self, overall_accuracy: float, accuracy_by_difficulty: List[Dict]) -> float:
         hard_accuracy = next((item["accuracy"] for item in accuracy_by_difficulty if item["difficulty"] == 3), 0.0) / 100
         avg_time = float(self.df["time_seconds"].mean())
+        return float(self._strength_formula(overall_accuracy, hard_accuracy, avg_time))
 
+    @staticmethod
+    def _strength_formula(accuracy, hard_accuracy, avg_time):
+        """Weighted strength score; accepts scalars or equally sized arrays"""
         # Speed score scaled so 120 seconds -> 0, 0 seconds -> 1
-        speed_score = max(0.0, min(1.0, 1 - (avg_time / 120)))
+        speed_score = np.clip(1 - (avg_time / 120), 0.0, 1.0)
 
-        weighted = (0.6 * overall_accuracy) + (0.25 * hard_accuracy) + (0.15 * speed_score)
+        weighted = (0.6 * accuracy) + (0.25 * hard_accuracy) + (0.15 * speed_score)
         return weighted * 100
 
-    def _strength_level(self, strength_score: float) -> str:
+    @staticmethod
+    def _strength_level(strength_score: float) -> str:
         if strength_score < 40:
             return "Weak"
         if strength_score < 60:
@@ -207,40 +287,77 @@ class PerformanceAnalyzer:
             return "Good"
         return "Strong"
 
+    def _subtopic_aggregates(self, keys: Optional[List[str]] = None) -> pd.DataFrame:
+        """Per-subtopic counts and sums from a single named-aggregation pass.
+
+        `keys` prefixes the grouping (e.g. a student id column) so cohort analysis shares this pass.
+        """
+        frame = self.df.assign(
+            incorrect=~self.df["correct"],
+            time_incorrect=self.df["time_seconds"].where(~self.df["correct"]),
+            is_high=self.df["topic_weightage"] == "high",
+        )
+        return frame.groupby([*(keys or []), "subtopic"], observed=True).agg(
+            topic=("topic", "first"),
+            attempts=("correct", "size"),
+            accuracy=("correct", "mean"),
+            mistakes=("incorrect", "sum"),
+            avg_time=("time_seconds", "mean"),
+            avg_time_incorrect=("time_incorrect", "mean"),
+            avg_difficulty=("difficulty", "mean"),
+            has_high_weightage=("is_high", "any"),
+        )
+
     def _rank_subtopics(self) -> List[Dict]:
-        grouped = self.df.groupby("subtopic")
-        ranking = []
-        for subtopic, data in grouped:
-            accuracy = float(data["correct"].mean())
-            mistakes = int((~data["correct"]).sum())
-            avg_time = float(data["time_seconds"].mean()) if not data.empty else 0.0
-            incorrect_subset = data[data["correct"] == False]
-            avg_time_incorrect = float(incorrect_subset["time_seconds"].mean()) if not incorrect_subset.empty else 0.0
-            avg_difficulty = float(data["difficulty"].mean()) if not data.empty else 0.0
-            has_high_weightage = bool((data["topic_weightage"] == "high").any())
-            difficulty_band = "hard" if avg_difficulty >= 2.5 else "medium" if avg_difficulty >= 1.5 else "easy"
-
-            priority_score = (
-                (100 - (accuracy * 100))
-                + (mistakes * 12)
-                + (10 if has_high_weightage else 0)
-                + (8 if difficulty_band == "hard" else 0)
-                + min(avg_time_incorrect / 20, 10)
-            )
+        ranking = self._subtopic_records(self._subtopic_aggregates())
+        self._sort_subtopic_ranking(ranking)
+        return ranking
+
+    @staticmethod
+    def _subtopic_records(agg: pd.DataFrame) -> List[Dict]:
+        """One ranking entry per row of `agg`, in row order"""
+        avg_time_incorrect = agg["avg_time_incorrect"].fillna(0.0)
+        difficulty_band = np.where(
+            agg["avg_difficulty"] >= 2.5, "hard",
+            np.where(agg["avg_difficulty"] >= 1.5, "medium", "easy"),
+        )
+        priority_score = (
+            (100 - (agg["accuracy"] * 100))
+            + (agg["mistakes"] * 12)
+            + np.where(agg["has_high_weightage"], 10, 0)
+            + np.where(difficulty_band == "hard", 8, 0)
+            + np.minimum(avg_time_incorrect / 20, 10)
+        )
 
-            ranking.append({
+        return [
+            {
                 "subtopic": subtopic,
-                "topic": data["topic"].iloc[0],
+                "topic": topic,
                 "accuracy": round(accuracy * 100, 2),
-                "attempts": int(len(data)),
+                "attempts": attempts,
                 "mistakes": mistakes,
                 "avg_time": round(avg_time, 2),
-                "avg_time_incorrect": round(avg_time_incorrect, 2),
-                "difficulty": difficulty_band,
-                "topic_weightage": "high" if has_high_weightage else "low",
-                "priority_score": round(priority_score, 2),
-            })
+                "avg_time_incorrect": round(time_incorrect, 2),
+                "difficulty": band,
+                "topic_weightage": "high" if has_high else "low",
+                "priority_score": round(score, 2),
+            }
+            for subtopic, topic, accuracy, attempts, mistakes, avg_time, time_incorrect, band, has_high, score in zip(
+                agg.index.get_level_values("subtopic").tolist(),
+                agg["topic"].tolist(),
+                agg["accuracy"].tolist(),
+                agg["attempts"].tolist(),
+                agg["mistakes"].tolist(),
+                agg["avg_time"].tolist(),
+                avg_time_incorrect.tolist(),
+                difficulty_band.tolist(),
+                agg["has_high_weightage"].tolist(),
+                priority_score.tolist(),
+            )
+        ]
 
+    @staticmethod
+    def _sort_subtopic_ranking(ranking: List[Dict]) -> None:
         ranking.sort(
             key=lambda item: (
                 item["topic_weightage"] == "high",
@@ -251,14 +368,12 @@ class PerformanceAnalyzer:
             ),
             reverse=True,
         )
-        return ranking
+
+    def _test_id_column(self) -> Optional[str]:
+        return self.test_id_column(self.df.columns)
 
     def _strength_progression(self) -> List[Dict]:
-        test_id_col = None
-        for col in self.TEST_ID_COLUMNS:
-            if col in self.df.columns:
-                test_id_col = col
-                break
+        test_id_col = self._test_id_column()
 
         if not test_id_col:
             return [{"test_id": "Test 1", "strength_score": round(self._strength_score(
@@ -266,37 +381,82 @@ class PerformanceAnalyzer:
                 self._accuracy_by_difficulty()
             ), 2)}]
 
-        progression = []
-        for test_id, data in self.df.groupby(test_id_col):
-            analyzer = PerformanceAnalyzer(data)
-            analyzer._normalize_columns()
-            analyzer._validate_and_clean_data()
-            accuracy = float(analyzer.df["correct"].mean())
-            strength_score = analyzer._strength_score(accuracy, analyzer._accuracy_by_difficulty())
-            progression.append({
-                "test_id": str(test_id),
-                "strength_score": round(strength_score, 2),
-            })
+        return self._progression_records(self._test_aggregates(test_id_col))
 
-        return progression
+    def _test_aggregates(self, test_id_col: str, keys: Optional[List[str]] = None) -> pd.DataFrame:
+        """Per-test accuracy, hard accuracy and mean time, with the strength formula applied column-wise"""
+        frame = self.df.assign(
+            hard_correct=self.df["correct"].astype(float).where(self.df["difficulty"] == 3),
+        )
+        per_test = frame.groupby([*(keys or []), test_id_col], observed=True).agg(
+            accuracy=("correct", "mean"),
+            hard_accuracy=("hard_correct", "mean"),
+            avg_time=("time_seconds", "mean"),
+        )
+        return self._add_strength_scores(per_test)
+
+    @classmethod
+    def _add_strength_scores(cls, per_test: pd.DataFrame) -> pd.DataFrame:
+        """Apply the strength formula to accuracy, hard_accuracy (NaN if no hard attempts) and avg_time columns"""
+        # Match _accuracy_by_difficulty, which reports hard accuracy as a percentage rounded to 2 places
+        hard_accuracy = np.array(
+            [round(value * 100, 2) for value in per_test["hard_accuracy"].fillna(0.0).tolist()]
+        ) / 100
+        per_test["strength_score"] = cls._strength_formula(
+            per_test["accuracy"].to_numpy(),
+            hard_accuracy,
+            per_test["avg_time"].to_numpy(),
+        )
+        return per_test
+
+    @staticmethod
+    def _progression_records(per_test: pd.DataFrame) -> List[Dict]:
+        return [
+            {"test_id": str(test_id), "strength_score": round(score, 2)}
+            for test_id, score in zip(
+                per_test.index.get_level_values(-1).tolist(),
+                per_test["strength_score"].tolist(),
+            )
+        ]
 
-    def _prioritize_topics(self) -> List[Dict]:
-        grouped = self.df.groupby("topic")
-        prioritized = []
+    def _topic_aggregates(self, keys: Optional[List[str]] = None) -> pd.DataFrame:
+        frame = self.df.assign(
+            incorrect=~self.df["correct"],
+            is_high=self.df["topic_weightage"] == "high",
+        )
+        return frame.groupby([*(keys or []), "topic"], observed=True).agg(
+            mistakes=("incorrect", "sum"),
+            total=("correct", "size"),
+            avg_difficulty=("difficulty", "mean"),
+            has_high_weightage=("is_high", "any"),
+        )
 
-        for topic, data in grouped:
-            mistakes = int((~data["correct"]).sum())
-            avg_difficulty = float(data["difficulty"].mean()) if not data.empty else 0.0
-            has_high_weightage = bool((data["topic_weightage"] == "high").any())
+    def _prioritize_topics(self) -> List[Dict]:
+        prioritized = self._topic_records(self._topic_aggregates())
+        self._sort_prioritized_topics(prioritized)
+        return prioritized
 
-            prioritized.append({
+    @staticmethod
+    def _topic_records(agg: pd.DataFrame) -> List[Dict]:
+        return [
+            {
                 "topic": topic,
                 "mistakes": mistakes,
-                "total": int(len(data)),
-                "weightage": "high" if has_high_weightage else "low",
+                "total": total,
+                "weightage": "high" if has_high else "low",
                 "difficulty": "hard" if avg_difficulty >= 2.5 else "easy",
-            })
+            }
+            for topic, mistakes, total, avg_difficulty, has_high in zip(
+                agg.index.get_level_values("topic").tolist(),
+                agg["mistakes"].tolist(),
+                agg["total"].tolist(),
+                agg["avg_difficulty"].tolist(),
+                agg["has_high_weightage"].tolist(),
+            )
+        ]
 
+    @staticmethod
+    def _sort_prioritized_topics(prioritized: List[Dict]) -> None:
         prioritized.sort(
             key=lambda item: (
                 item["weightage"] == "high",
@@ -305,4 +465,3 @@ class PerformanceAnalyzer:
             ),
             reverse=True,
         )
-        return prioritized
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from analyzer import PerformanceAnalyzer
+from ingest import is_supported, read_attempts
+from parallel import pool_map
+
+
+class BatchAnalyzer:
+    """Analyzes many attempt files at once, one file per task in the shared process pool.
+
+    Parsing and analysis are CPU-bound pandas work, so files are spread over processes rather
+    than threads; each task is a (path, filename) pair and reads its file from disk itself.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+
+    def workers_for(self, files: int) -> int:
+        """Processes a batch of `files` files keeps busy: one per file, up to `workers`"""
+        return max(1, min(self.workers, files))
+
+    def analyze_files(self, files: List[Tuple[str, str]]) -> List[Dict]:
+        """One result per (path, filename), in order: {'filename', 'analysis', 'correct'} or {'filename', 'error'}"""
+        if self.workers_for(len(files)) == 1:
+            return [_analyze_file(path, filename) for path, filename in files]
+
+        # The pool is shared at its full size, so smaller batches don't each start a pool of their own;
+        # one task per file means at most len(files) of its processes are busy
+
+        paths, filenames = zip(*files)
+        return pool_map(self.workers, _analyze_file, paths, filenames)
+
+    @staticmethod
+    def compare(results: List[Dict], top_subtopics: int = 5) -> Dict:
+        """Cross-file comparison: pooled accuracy, files ranked weakest first and shared weak subtopics"""
+        analyzed = [result for result in results if "analysis" in result]
+        total_attempts = sum(result["analysis"]["summary"]["total_attempts"] for result in analyzed)
+        correct = sum(result["correct"] for result in analyzed)
+
+        ranking = []
+        weak_subtopics = Counter()
+        for result in analyzed:
+            summary = result["analysis"]["summary"]
+            subtopics = [item["subtopic"] for item in result["analysis"]["subtopic_ranking"][:top_subtopics]]
+            weak_subtopics.update(subtopics)
+            ranking.append({
+                "filename": result["filename"],
+                "total_attempts": summary["total_attempts"],
+                "overall_accuracy": summary["overall_accuracy"],
+                "strength_level": summary["strength_level"],
+                "weakest_subtopic": subtopics[0] if subtopics else None,
+            })
+        ranking.sort(key=lambda item: (item["overall_accuracy"], item["filename"]))
+
+        return {
+            "files": len(analyzed),
+            "failed": len(results) - len(analyzed),
+            "total_attempts": total_attempts,
+            "overall_accuracy": round(correct / total_attempts * 100, 2) if total_attempts else 0.0,
+            "ranking": ranking,
+            # Subtopics among the weakest in more than one file, most widespread first
+            "common_weak_subtopics": [
+                {"subtopic": subtopic, "files": count}
+                for subtopic, count in sorted(weak_subtopics.items(), key=lambda item: (-item[1], item[0]))
+                if count > 1
+            ],
+        }
+
+
+def extract_zip(source, directory: str, max_bytes: int) -> List[Tuple[str, str]]:
+    """Write the supported members of a zip archive into `directory`; returns (path, filename) pairs.
+
+    Members are written under generated names, so archive paths can't escape `directory`.
+    Raises ValueError if the archive would expand past `max_bytes`.
+    """
+    with zipfile.ZipFile(source) as archive:
+        members = [
+            info for info in archive.infolist()
+            if not info.is_dir() and not info.filename.startswith("__MACOSX/") and is_supported(info.filename)
+        ]
+        if sum(info.file_size for info in members) > max_bytes:
+            raise ValueError(f"Zip archive expands past {max_bytes // (1024 * 1024)}MB")
+
+        files = []
+        for info in members:
+            fd, path = tempfile.mkstemp(dir=directory)
+            with archive.open(info) as member, os.fdopen(fd, "wb") as target:
+                shutil.copyfileobj(member, target, 1024 * 1024)
+            files.append((path, info.filename))
+        return files
+
+
+def _analyze_file(path: str, filename: str) -> Dict:
+    try:
+        df = read_attempts(path, filename)
+        if df.empty:
+            return {"filename": filename, "error": "CSV file is empty"}
+        analyzer = PerformanceAnalyzer(df)
+        analysis = analyzer.analyze()
+        return {"filename": filename, "analysis": analysis, "correct": int(analyzer.df["correct"].sum())}
+    except Exception as e:
+        return {"filename": filename, "error": str(e)}
@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+"""Benchmarks for the analysis pipeline on synthetic attempt data.
+
+Usage:
+    python benchmark.py rankings --rows 1000000
+    python benchmark.py progression --rows 1000000
+    python benchmark.py cleaning --rows 1000000
+    python benchmark.py cohort --rows 200000
+    python benchmark.py parallel --rows 10000000
+    python benchmark.py streaming --rows 1000000
+    python benchmark.py ingest --rows 1000000
+    python benchmark.py formats --rows 1000000
+    python benchmark.py loader --rows 1000000
+    python benchmark.py batch --rows 2000000
+    python benchmark.py serialization --rows 200000
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from flask import Flask
+
+import aggregates
+from analyzer import PerformanceAnalyzer
+from batch import BatchAnalyzer
+from cohort import CohortAnalyzer
+from parallel import ShardedCohortAnalyzer
+from streaming import StreamingAnalyzer
+from ingest import CSV_ENGINE, pa, read_attempts_columnar, read_attempts_csv
+from loader import BulkLoader, ensure_schema
+from planner import SevenDayPlanner
+from recommendations import StudyMaterialRecommender
+from serialization import ENCODINGS, FastJSONProvider, compress, orjson
+
+
+def make_attempts(rows: int, students: int = 500, tests: int = 50, subtopics: int = 5000, seed: int = 42) -> pd.DataFrame:
+    """Build a synthetic attempts export with the same columns as sample_data.csv"""
+    rng = np.random.default_rng(seed)
+    subtopic_ids = rng.integers(0, subtopics, rows)
+    return pd.DataFrame({
+        "student_id": pd.Series(rng.integers(0, students, rows)).map("S{:05d}".format),
+        "test_id": pd.Series(rng.integers(0, tests, rows)).map("T{:03d}".format),
+        "question_id": pd.Series(np.arange(rows)).map("Q{:07d}".format),
+        "subject": "Physics",
+        "topic": pd.Series(subtopic_ids % 40).map("Topic {}".format),
+        "subtopic": pd.Series(subtopic_ids).map("Subtopic {}".format),
+        "difficulty_level": rng.choice(["easy", "medium", "hard"], rows),
+        "is_correct": rng.integers(0, 2, rows),
+        "time_taken": rng.integers(10, 180, rows),
+        "topic_weightage": rng.choice(["high", "low"], rows),
+    })
+
+
+def timed(func: Callable, repeat: int = 3) -> float:
+    """Best wall-clock time of `repeat` runs, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(func: Callable) -> float:
+    """Peak traced allocation while running `func`, in MB"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _legacy_rank_subtopics(df: pd.DataFrame) -> List[Dict]:
+    """Reference per-group loop used by PerformanceAnalyzer before the named-aggregation pass"""
+    ranking = []
+    for subtopic, data in df.groupby("subtopic"):
+        incorrect_subset = data[data["correct"] == False]
+        ranking.append({
+            "subtopic": subtopic,
+            "topic": data["topic"].iloc[0],
+            "accuracy": float(data["correct"].mean()),
+            "mistakes": int((~data["correct"]).sum()),
+            "avg_time": float(data["time_seconds"].mean()),
+            "avg_time_incorrect": float(incorrect_subset["time_seconds"].mean()) if not incorrect_subset.empty else 0.0,
+            "avg_difficulty": float(data["difficulty"].mean()),
+            "has_high_weightage": bool((data["topic_weightage"] == "high").any()),
+        })
+    return ranking
+
+
+def _legacy_prioritize_topics(df: pd.DataFrame) -> List[Dict]:
+    prioritized = []
+    for topic, data in df.groupby("topic"):
+        prioritized.append({
+            "topic": topic,
+            "mistakes": int((~data["correct"]).sum()),
+            "total": int(len(data)),
+            "avg_difficulty": float(data["difficulty"].mean()),
+            "has_high_weightage": bool((data["topic_weightage"] == "high").any()),
+        })
+    return prioritized
+
+
+def _legacy_strength_progression(df: pd.DataFrame) -> List[Dict]:
+    """Reference loop that re-instantiated and re-cleaned an analyzer for every test"""
+    progression = []
+    for test_id, data in df.groupby("test_id"):
+        analyzer = PerformanceAnalyzer(data)
+        analyzer._normalize_columns()
+        analyzer._validate_and_clean_data()
+        accuracy = float(analyzer.df["correct"].mean())
+        strength_score = analyzer._strength_score(accuracy, analyzer._accuracy_by_difficulty())
+        progression.append({"test_id": str(test_id), "strength_score": round(strength_score, 2)})
+    return progression
+
+
+def _legacy_clean_columns(analyzer: PerformanceAnalyzer, df: pd.DataFrame) -> None:
+    """Reference per-row .apply() normalization of the correctness and difficulty columns"""
+    df["correct"].apply(analyzer._to_bool)
+    pd.to_numeric(df["difficulty"].apply(analyzer._normalize_difficulty), errors="coerce")
+
+
+def _cleaned_analyzer(rows: int, **kwargs) -> PerformanceAnalyzer:
+    analyzer = PerformanceAnalyzer(make_attempts(rows, **kwargs))
+    analyzer._normalize_columns()
+    analyzer._validate_and_clean_data()
+    return analyzer
+
+
+def bench_rankings(rows: int) -> None:
+    analyzer = _cleaned_analyzer(rows)
+    df = analyzer.df
+
+    legacy = timed(lambda: (_legacy_rank_subtopics(df), _legacy_prioritize_topics(df)), repeat=1)
+    current = timed(lambda: (analyzer._rank_subtopics(), analyzer._prioritize_topics()))
+
+    print(f"rankings on {rows:,} rows ({df['subtopic'].nunique():,} subtopics)")
+    print(f"  per-group loop:      {legacy:8.3f}s")
+    print(f"  named aggregation:   {current:8.3f}s")
+    print(f"  speedup:             {legacy / current:8.1f}x")
+
+
+def bench_progression(rows: int) -> None:
+    raw = make_attempts(rows, tests=500)
+    analyzer = PerformanceAnalyzer(raw)
+    analyzer._normalize_columns()
+    analyzer._validate_and_clean_data()
+    df = analyzer.df
+
+    # The legacy loop cleaned each test's raw rows itself, so it gets the raw export
+    legacy = timed(lambda: _legacy_strength_progression(raw), repeat=1)
+    current = timed(analyzer._strength_progression)
+
+    print(f"strength progression on {rows:,} rows ({df['test_id'].nunique():,} tests)")
+    print(f"  analyzer per test:   {legacy:8.3f}s")
+    print(f"  grouped computation: {current:8.3f}s")
+    print(f"  speedup:             {legacy / current:8.1f}x")
+
+
+def bench_cleaning(rows: int) -> None:
+    raw = make_attempts(rows)
+    raw["is_correct"] = raw["is_correct"].map({0: "no", 1: "Yes"})
+    analyzer = PerformanceAnalyzer(raw)
+    analyzer._normalize_columns()
+    df = analyzer.df
+
+    legacy = timed(lambda: _legacy_clean_columns(analyzer, df), repeat=1)
+    current = timed(lambda: (
+        analyzer._normalize_correct(df["correct"]),
+        analyzer._normalize_difficulty_column(df["difficulty"]),
+    ))
+
+    print(f"correctness/difficulty cleaning on {rows:,} rows")
+    print(f"  per-row apply:       {legacy:8.3f}s")
+    print(f"  per distinct value:  {current:8.3f}s")
+    print(f"  speedup:             {legacy / current:8.1f}x")
+
+
+def bench_cohort(rows: int) -> None:
+    df = make_attempts(rows, students=5000)
+
+    def per_student():
+        for _, data in df.groupby("student_id"):
+            PerformanceAnalyzer(data).analyze()
+
+    legacy = timed(per_student, repeat=1)
+    current = timed(lambda: CohortAnalyzer(df).analyze(), repeat=1)
+
+    print(f"cohort analysis on {rows:,} rows ({df['student_id'].nunique():,} students)")
+    print(f"  analyze() per student: {legacy:8.3f}s")
+    print(f"  CohortAnalyzer:        {current:8.3f}s")
+    print(f"  speedup:               {legacy / current:8.1f}x")
+
+
+def bench_parallel(rows: int) -> None:
+    df = make_attempts(rows, students=5000)
+    baseline = timed(lambda: CohortAnalyzer(df).analyze(), repeat=1)
+
+    print(f"sharded cohort analysis on {rows:,} rows ({os.cpu_count()} CPUs)")
+    print(f"  1 worker (in-process): {baseline:8.3f}s")
+    for workers in [2, 4, 8, 16]:
+        elapsed = timed(lambda: ShardedCohortAnalyzer(df, workers=workers).analyze(), repeat=1)
+        print(f"  {workers:2d} workers:            {elapsed:8.3f}s  speedup {baseline / elapsed:5.2f}x")
+
+
+def bench_batch(rows: int, files: int = 24) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        df = make_attempts(rows)
+        paths = []
+        for index, rows_in_section in enumerate(np.array_split(np.arange(len(df)), files)):
+            section = df.iloc[rows_in_section]
+            path = os.path.join(tmp, f"section{index:02d}.csv")
+            section.to_csv(path, index=False)
+            paths.append((path, os.path.basename(path)))
+
+        baseline = timed(lambda: BatchAnalyzer(workers=1).analyze_files(paths), repeat=1)
+        print(f"batch analysis of {files} files, {rows:,} rows in total ({os.cpu_count()} CPUs)")
+        print(f"  1 worker (serial):     {baseline:8.3f}s")
+        for workers in [2, 4, 8]:
+            elapsed = timed(lambda: BatchAnalyzer(workers=workers).analyze_files(paths), repeat=1)
+            print(f"  {workers:2d} workers:            {elapsed:8.3f}s  speedup {baseline / elapsed:5.2f}x")
+
+
+def bench_streaming(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "attempts.csv")
+        make_attempts(rows).to_csv(path, index=False)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        def in_memory():
+            PerformanceAnalyzer(pd.read_csv(path)).analyze()
+
+        def streaming():
+            StreamingAnalyzer.from_csv(path).result()
+
+        print(f"analysis of a {size_mb:,.1f} MB CSV ({rows:,} rows)")
+        print(f"  read_csv + analyze():  {timed(in_memory, repeat=1):8.3f}s  peak {peak_memory(in_memory):8.1f} MB")
+        print(f"  StreamingAnalyzer:     {timed(streaming, repeat=1):8.3f}s  peak {peak_memory(streaming):8.1f} MB")
+
+
+def bench_ingest(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "attempts.csv")
+        make_attempts(rows).to_csv(path, index=False)
+        size_mb = os.path.getsize(path) / 1024 / 1024
+
+        legacy = timed(lambda: pd.read_csv(path), repeat=1)
+        projected_c = timed(lambda: read_attempts_csv(path, engine="c"), repeat=1)
+
+        print(f"parsing a {size_mb:,.1f} MB CSV ({rows:,} rows)")
+        print(f"  pd.read_csv, all columns:   {legacy:8.3f}s  peak {peak_memory(lambda: pd.read_csv(path)):8.1f} MB")
+        print(f"  read_attempts_csv (c):      {projected_c:8.3f}s  "
+              f"peak {peak_memory(lambda: read_attempts_csv(path, engine='c')):8.1f} MB")
+        projected = projected_c
+        if CSV_ENGINE != "c":
+            projected = timed(lambda: read_attempts_csv(path), repeat=1)
+            print(f"  read_attempts_csv ({CSV_ENGINE}): {projected:8.3f}s")
+        print(f"  speedup:                    {legacy / projected:8.1f}x")
+
+
+def bench_formats(rows: int) -> None:
+    if pa is None:
+        print("formats benchmark requires pyarrow")
+        return
+    import pyarrow.feather as feather
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = make_attempts(rows)
+        paths = {fmt: os.path.join(tmp, f"attempts.{fmt}") for fmt in ["csv", "parquet", "arrow"]}
+        df.to_csv(paths["csv"], index=False)
+        df.to_parquet(paths["parquet"])
+        feather.write_feather(df, paths["arrow"], compression="uncompressed")
+        del df
+
+        loaders = {
+            "csv": lambda: read_attempts_csv(paths["csv"]),
+            "parquet": lambda: read_attempts_columnar(paths["parquet"], "parquet"),
+            "arrow": lambda: read_attempts_columnar(paths["arrow"], "arrow"),
+        }
+        # tracemalloc does not see Arrow-backed string columns, so the loaded frame's size is shown too
+        print(f"loading the analyzer's columns from {rows:,} rows")
+        for fmt, load in loaders.items():
+            size_mb = os.path.getsize(paths[fmt]) / 1024 / 1024
+            frame_mb = load().memory_usage(deep=True).sum() / 1024 / 1024
+            print(f"  {fmt:8s} file {size_mb:7.1f} MB  {timed(load, repeat=1):8.3f}s  "
+                  f"peak traced {peak_memory(load):7.1f} MB  frame {frame_mb:7.1f} MB")
+
+
+def _legacy_load_csv(db_path: str, csv_path: str) -> None:
+    """Reference per-row INSERT loop used by app.load_sample_data before BulkLoader"""
+    conn = sqlite3.connect(db_path)
+    ensure_schema(conn)
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        for row in csv.DictReader(csvfile):
+            if not row.get("question_id"):
+                continue
+            conn.execute(
+                "INSERT OR REPLACE INTO questions (question_id, student_id, test_id, subject, topic, subtopic, "
+                "difficulty_level, is_correct, time_taken, topic_weightage) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    row.get("question_id"), row.get("student_id"), row.get("test_id"), row.get("subject"),
+                    row.get("topic"), row.get("subtopic"), row.get("difficulty_level"),
+                    int(row.get("is_correct", 0)), int(row.get("time_taken", 0)),
+                    (row.get("topic_weightage") or "low").strip().lower(),
+                ),
+            )
+    conn.commit()
+    conn.close()
+
+
+def _legacy_load_with_aggregates(db_path: str, csv_path: str) -> None:
+    """The per-row loop followed by the aggregate rebuild it would need to keep stored analyses current"""
+    _legacy_load_csv(db_path, csv_path)
+    conn = sqlite3.connect(db_path)
+    aggregates.ensure_schema(conn)  # creates the tables and builds them from the loaded rows
+    conn.close()
+
+
+def bench_loader(rows: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "attempts.csv")
+        make_attempts(rows).to_csv(csv_path, index=False)
+
+        legacy = timed(lambda: _legacy_load_csv(os.path.join(tmp, "legacy.db"), csv_path), repeat=1)
+        legacy_aggregated = timed(
+            lambda: _legacy_load_with_aggregates(os.path.join(tmp, "legacy_aggregated.db"), csv_path), repeat=1
+        )
+        with BulkLoader(os.path.join(tmp, "bulk.db")) as loader:
+            bulk = loader.load_files([csv_path])[0]["seconds"]
+            # Loading the same rows again replaces every one: subtract, upsert, add and relabel
+            replacing = loader.load_files([csv_path])[0]["seconds"]
+
+        print(f"loading {rows:,} attempts into SQLite")
+        print(f"  per-row INSERT, no aggregates:    {legacy:8.3f}s  {rows / legacy:10,.0f} rows/s")
+        print(f"  per-row INSERT + aggregate build: {legacy_aggregated:8.3f}s  {rows / legacy_aggregated:10,.0f} rows/s")
+        print(f"  BulkLoader with aggregates:       {bulk:8.3f}s  {rows / bulk:10,.0f} rows/s")
+        print(f"  BulkLoader replacing every row:   {replacing:8.3f}s  {rows / replacing:10,.0f} rows/s")
+        print(f"  speedup (like for like):          {legacy_aggregated / bulk:8.1f}x")
+
+
+def _upload_payload(df: pd.DataFrame, recommender: StudyMaterialRecommender) -> Dict:
+    """An /api/upload response body without the GenAI parts: analysis, plan, materials and tips"""
+    analysis = PerformanceAnalyzer(df).analyze()
+    ranked = analysis["subtopic_ranking"]
+    return {
+        "success": True,
+        "analysis": analysis,
+        "plan": SevenDayPlanner(ranked, analysis["prioritized_topics"]).generate_plan(),
+        "recommendations": recommender.recommend_materials(ranked, analysis["topics"]),
+        "study_tips": {item["subtopic"]: recommender.get_subtopic_study_tips(item) for item in ranked[:5]},
+    }
+
+
+def bench_serialization(rows: int) -> None:
+    recommender = StudyMaterialRecommender()
+    payloads = {
+        "student upload": _upload_payload(make_attempts(rows, students=1), recommender),
+        "cohort upload": {"success": True, "cohort": CohortAnalyzer(make_attempts(rows, students=5000)).analyze()},
+    }
+    app = Flask(__name__)
+    backends = ["stdlib"] + (["orjson"] if orjson is not None else [])
+    providers = {backend: FastJSONProvider(app, backend) for backend in backends}
+
+    for name, payload in payloads.items():
+        print(f"{name} response from {rows:,} rows")
+        for backend, provider in providers.items():
+            elapsed = timed(lambda: provider.response(payload))
+            size_kb = len(provider.response(payload).get_data()) / 1024
+            print(f"  {backend:8s} serialize:   {elapsed * 1000:8.1f} ms  {size_kb:10,.1f} KB")
+        body = providers[backends[-1]].response(payload).get_data()
+        for encoding in ENCODINGS:
+            elapsed = timed(lambda: compress(body, encoding))
+            size_kb = len(compress(body, encoding)) / 1024
+            print(f"  {encoding:8s} compress:    {elapsed * 1000:8.1f} ms  {size_kb:10,.1f} KB on the wire"
+                  f"  ({len(body) / 1024 / size_kb:4.1f}x smaller)")
+
+
+BENCHMARKS = {
+    "serialization": bench_serialization,
+    "batch": bench_batch,
+    "streaming": bench_streaming,
+    "ingest": bench_ingest,
+    "formats": bench_formats,
+    "loader": bench_loader,
+    "parallel": bench_parallel,
+    "cohort": bench_cohort,
+    "cleaning": bench_cleaning,
+    "progression": bench_progression,
+    "rankings": bench_rankings,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args.rows)
@@ -0,0 +1,195 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ResultCache:
+    """Thread-safe LRU cache of serialized responses with a TTL and entry/byte limits"""
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 64 * 1024 * 1024, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, body); order is least to most recently used
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def content_key(stream, *parts: str, block_size: int = 1024 * 1024) -> str:
+        """SHA-256 of a seekable stream plus extra key parts; the stream is rewound afterwards"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        for block in iter(lambda: stream.read(block_size), b""):
+            digest.update(block)
+        stream.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """SHA-256 over key parts alone, e.g. a content hash plus a pipeline version"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remove(self, key: str) -> None:
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+
+class FileDerivedResponse:
+    """A response body computed from one file, kept until the file changes.
+
+    Each get() stats the file; the body is only rebuilt when the file's mtime or size moved and
+    its SHA-256 differs too, so touching the file costs one hash, not a rebuild. The ETag is
+    the SHA-256 of the body, so it is a strong validator.
+    """
+
+    def __init__(self, path: str, build: Callable[[str], bytes]):
+        self.path = path
+        self.build = build
+        self._stat: Optional[tuple] = None
+        self._file_hash: Optional[str] = None
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def get(self) -> Tuple[bytes, str]:
+        """(body, etag), rebuilding first if the file changed; build errors propagate uncached"""
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if signature != self._stat:
+                with open(self.path, "rb") as handle:
+                    file_hash = ResultCache.content_key(handle)
+                if file_hash != self._file_hash:
+                    body = self.build(self.path)
+                    self._body, self._etag = body, hashlib.sha256(body).hexdigest()
+                    self._file_hash = file_hash
+                    self.builds += 1
+                self._stat = signature
+            return self._body, self._etag
+
+
+class Flight:
+    """One in-progress computation that other callers can wait on"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        """The leader's result, re-raising its exception; None if it gave up without a result"""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Coalesces concurrent computations of the same key.
+
+    The first caller for a key becomes the leader and computes; callers arriving while it runs
+    join its Flight and share the result (or exception) instead of computing again. The key is
+    forgotten once the leader finishes, so later callers start afresh (or hit a cache the
+    leader filled).
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join(self, key: str) -> Tuple[Flight, bool]:
+        """(flight, is_leader); a leader must call finish, even when it fails or gives up"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            self.leaders += 1
+            return flight, True
+
+    def finish(self, key: str, flight: Flight, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Publish the leader's outcome; a None result without an error makes waiters compute themselves"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.result, flight.error = result, error
+        flight._done.set()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(fn() or the in-flight leader's result, whether it was shared); fn must not return None"""
+        while True:
+            flight, leader = self.join(key)
+            if not leader:
+                result = flight.wait()
+                if result is not None:
+                    return result, True
+                continue
+            try:
+                result = fn()
+            except BaseException as e:
+                self.finish(key, flight, error=e)
+                raise
+            self.finish(key, flight, result=result)
+            return result, False
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"in_flight": len(self._flights), "leaders": self.leaders, "coalesced": self.coalesced}
@@ -0,0 +1,139 @@
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from analyzer import PerformanceAnalyzer
+
+
+class CohortAnalyzer(PerformanceAnalyzer):
+    """Analyzes every student in a multi-student export with grouped computations keyed by student"""
+
+    STUDENT_ID_COLUMNS = ["student_id", "student", "roll_no", "learner_id"]
+
+    CLEANING_COLUMNS = PerformanceAnalyzer.CLEANING_COLUMNS + ["student_id"]
+
+    def analyze(self) -> Dict:
+        """Per-student analysis matching PerformanceAnalyzer.analyze for each student's rows"""
+        self._normalize_columns()
+        self._validate_and_clean_data()
+
+        results = self._student_results()
+        self.analysis_results = {
+            "cohort_summary": self._cohort_summary(results, len(self.df), int(self.df["correct"].sum())),
+            "students": results,
+            "data_quality": self.cleaning_report,
+        }
+        return self.analysis_results
+
+    def _student_results(self) -> List[Dict]:
+        """One analyze()-shaped result per student, ordered by student id"""
+        keys = ["student_id"]
+        students = self._student_aggregates()
+        subtopic_agg = self._subtopic_aggregates(keys)
+        topic_agg = self._topic_aggregates(keys)
+        rankings = self._by_student(subtopic_agg, self._subtopic_records(subtopic_agg))
+        prioritized = self._by_student(topic_agg, self._topic_records(topic_agg))
+        topics = self._by_student(topic_agg, topic_agg.index.get_level_values("topic").tolist())
+
+        test_id_col = self._test_id_column()
+        if test_id_col:
+            per_test = self._test_aggregates(test_id_col, keys)
+            progressions = self._by_student(per_test, self._progression_records(per_test))
+        else:
+            progressions = {
+                student_id: [{"test_id": "Test 1", "strength_score": round(score, 2)}]
+                for student_id, score in zip(students.index.tolist(), students["strength_score"].tolist())
+            }
+
+        results = []
+        for student_id, row in zip(students.index.tolist(), students.to_dict("records")):
+            strength_level = self._strength_level(row["strength_score"])
+            self._sort_subtopic_ranking(rankings[student_id])
+            self._sort_prioritized_topics(prioritized[student_id])
+            results.append({
+                "student_id": student_id,
+                "summary": {
+                    "total_attempts": int(row["total_attempts"]),
+                    "overall_accuracy": round(row["accuracy"] * 100, 2),
+                    "avg_time_correct": round(row["avg_time_correct"], 2),
+                    "avg_time_incorrect": round(row["avg_time_incorrect"], 2),
+                    "strength_level": strength_level,
+                },
+                "accuracy_by_difficulty": [
+                    {
+                        "difficulty": diff,
+                        "accuracy": round(row[f"accuracy_{diff}"] * 100, 2),
+                        "attempts": int(row[f"attempts_{diff}"]),
+                    }
+                    for diff in [1, 2, 3]
+                ],
+                "time_comparison": {
+                    "avg_time_correct": row["avg_time_correct"],
+                    "avg_time_incorrect": row["avg_time_incorrect"],
+                },
+                "strength_progression": progressions.get(student_id, []),
+                "subtopic_ranking": rankings[student_id],
+                "topics": sorted(topics[student_id]),
+                "prioritized_topics": prioritized[student_id],
+            })
+
+        return results
+
+    @staticmethod
+    def _cohort_summary(results: List[Dict], total_attempts: int, correct: int) -> Dict:
+        level_counts = {"Weak": 0, "Developing": 0, "Good": 0, "Strong": 0}
+        for result in results:
+            level_counts[result["summary"]["strength_level"]] += 1
+        return {
+            "total_students": len(results),
+            "total_attempts": int(total_attempts),
+            "overall_accuracy": round(float(correct / total_attempts) * 100, 2),
+            "strength_levels": level_counts,
+        }
+
+    @classmethod
+    def student_column(cls, columns) -> Optional[str]:
+        """The raw column holding student ids, matched case-insensitively, or None"""
+        lower_map = {col.lower().strip(): col for col in columns}
+        return next((lower_map[option] for option in cls.STUDENT_ID_COLUMNS if option in lower_map), None)
+
+    @classmethod
+    def resolve_columns(cls, columns) -> Dict[str, str]:
+        # The student column comes first so the base projection keeps and renames it
+        student_col = cls.student_column(columns)
+        if student_col is None:
+            raise ValueError("Missing required columns: student_id")
+        return {"student_id": student_col, **super().resolve_columns(columns)}
+
+    def _student_aggregates(self) -> pd.DataFrame:
+        """Summary, time and per-difficulty metrics for every student from grouped passes"""
+        correct = self.df["correct"]
+        time_seconds = self.df["time_seconds"]
+        frame = self.df.assign(
+            time_correct=time_seconds.where(correct),
+            time_incorrect=time_seconds.where(~correct),
+        )
+        for diff in [1, 2, 3]:
+            is_level = self.df["difficulty"] == diff
+            frame[f"attempts_{diff}"] = is_level
+            frame[f"accuracy_{diff}"] = correct.astype(float).where(is_level)
+
+        students = frame.groupby("student_id", observed=True).agg(
+            total_attempts=("correct", "size"),
+            accuracy=("correct", "mean"),
+            avg_time=("time_seconds", "mean"),
+            avg_time_correct=("time_correct", "mean"),
+            avg_time_incorrect=("time_incorrect", "mean"),
+            **{f"attempts_{diff}": (f"attempts_{diff}", "sum") for diff in [1, 2, 3]},
+            **{f"accuracy_{diff}": (f"accuracy_{diff}", "mean") for diff in [1, 2, 3]},
+        ).fillna(0.0)
+
+        students["hard_accuracy"] = students["accuracy_3"]
+        return self._add_strength_scores(students)
+
+    @staticmethod
+    def _by_student(agg: pd.DataFrame, records: List[Any]) -> Dict[Any, List[Any]]:
+        """Split records built from a student-keyed aggregate into one list per student"""
+        grouped = {}
+        for student_id, record in zip(agg.index.get_level_values("student_id").tolist(), records):
+            grouped.setdefault(student_id, []).append(record)
+        return grouped
@@ -0,0 +1,18 @@
+"""Shared fixtures for tests that go through the Flask app"""
+
+import pytest
+
+import app as app_module
+from db import ConnectionPool
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client on an empty database in tmp_path, with upload persistence and caching reset"""
+    pool = ConnectionPool(str(tmp_path / "student.db"))
+    monkeypatch.setattr(app_module, "db_pool", pool)
+    monkeypatch.setitem(app_module.app.config, "PERSIST_UPLOADS", False)
+    app_module.result_cache.clear()
+    app_module.init_db()
+    yield app_module.app.test_client()
+    pool.close_all()
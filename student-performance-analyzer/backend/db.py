@@ -0,0 +1,92 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# Absolute, so the database doesn't depend on the directory the server was started from
+DB_PATH = os.path.abspath(os.getenv('STUDENT_DB', os.path.join(os.path.dirname(__file__), 'student.db')))
+
+# Seconds a connection waits on a locked database before raising "database is locked"
+BUSY_TIMEOUT = float(os.getenv('DB_BUSY_TIMEOUT', '30'))
+
+# Per-connection statement cache; long-lived connections reuse prepared statements across requests
+CACHED_STATEMENTS = 256
+
+# WAL lets readers keep working during a load; NORMAL sync is durable across app crashes in WAL mode
+PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -65536',  # 64MB page cache
+    'PRAGMA mmap_size = 268435456',  # read through up to 256MB of memory-mapped file
+]
+
+
+def configure(conn: sqlite3.Connection) -> None:
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+
+
+def connect(db_path: str = DB_PATH, **kwargs) -> sqlite3.Connection:
+    """A configured connection with the busy timeout and statement cache applied"""
+    kwargs.setdefault('timeout', BUSY_TIMEOUT)
+    kwargs.setdefault('cached_statements', CACHED_STATEMENTS)
+    conn = sqlite3.connect(db_path, **kwargs)
+    configure(conn)
+    return conn
+
+
+class ConnectionPool:
+    """Reuses configured SQLite connections across request threads.
+
+    A request borrows an idle connection (or opens one) and returns it afterwards, so PRAGMAs
+    are applied once per connection and its statement cache outlives the request. Up to
+    `max_idle` connections are kept; any extra ones opened under load are closed on release.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, max_idle: int = 8):
+        self.db_path = os.path.abspath(db_path)
+        self.max_idle = max_idle
+        self._idle: 'queue.LifoQueue[sqlite3.Connection]' = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict:
+        return {'db_path': self.db_path, 'opened': self.opened, 'idle': self._idle.qsize()}
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        # Connections move between request threads, but only one thread uses a connection at a time
+        conn = connect(self.db_path, check_same_thread=False)
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        # A request that failed mid-write must not leave its transaction open for the next borrower
+        if conn.in_transaction:
+            conn.rollback()
+        if self._idle.qsize() < self.max_idle:
+            self._idle.put(conn)
+        else:
+            conn.close()
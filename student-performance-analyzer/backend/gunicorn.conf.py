@@ -0,0 +1,12 @@
+# gunicorn -c gunicorn.conf.py wsgi:application
+# Reads the same WEB_* settings as wsgi.py without importing it, which would warm the app up in
+# the master. Each worker imports wsgi instead, warming up before it accepts connections.
+import os
+
+bind = f"{os.getenv('WEB_HOST', '0.0.0.0')}:{os.getenv('WEB_PORT', '5000')}"
+workers = int(os.getenv('WEB_WORKERS', '1'))
+threads = int(os.getenv('WEB_THREADS', '8'))
+worker_class = "gthread"
+timeout = int(os.getenv('WEB_TIMEOUT', '120'))
+# Not preloaded: the app's thread pools and SQLite connections must be created in each worker, not forked
+preload_app = False
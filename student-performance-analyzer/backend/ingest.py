@@ -0,0 +1,203 @@
+import os
+import pandas as pd
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from analyzer import PerformanceAnalyzer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    pa = pq = None
+    CSV_ENGINE = "c"
+
+# Upload extension -> format; Feather v2 is the Arrow IPC file format
+FILE_FORMATS = {"csv": "csv", "parquet": "parquet", "pq": "parquet", "arrow": "arrow", "feather": "arrow", "ipc": "arrow"}
+
+# Compression suffix -> pandas compression name; only CSV is accepted compressed
+COMPRESSIONS = {"gz": "gzip", "zst": "zstd"}
+
+DEFAULT_BATCH_SIZE = 100_000
+
+
+def _extensions(filename: str) -> Tuple[str, Optional[str]]:
+    """(format extension, compression extension or None), e.g. "a.csv.gz" -> ("csv", "gz")"""
+    stem, extension = os.path.splitext(filename.lower())
+    extension = extension.lstrip(".")
+    if extension in COMPRESSIONS:
+        return os.path.splitext(stem)[1].lstrip("."), extension
+    return extension, None
+
+
+def file_format(filename: str) -> str:
+    """Upload format from a file name's extension; unknown extensions are read as CSV"""
+    return FILE_FORMATS.get(_extensions(filename)[0], "csv")
+
+
+def file_compression(filename: str) -> Optional[str]:
+    """Pandas compression name for .gz/.zst uploads, else None"""
+    compression = _extensions(filename)[1]
+    return COMPRESSIONS[compression] if compression else None
+
+
+def is_supported(filename: str) -> bool:
+    extension, compression = _extensions(filename)
+    return FILE_FORMATS.get(extension) == "csv" if compression else extension in FILE_FORMATS
+
+
+def read_header(source, **read_csv_kwargs) -> List[str]:
+    """Column names of a CSV path or seekable file object; file objects are rewound"""
+    header = pd.read_csv(source, nrows=0, **read_csv_kwargs).columns.tolist()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return header
+
+
+def resolve_schema(header: Iterable[str], analyzer_cls: Type[PerformanceAnalyzer] = PerformanceAnalyzer,
+                   keep: Iterable[str] = ()) -> Tuple[List[str], Dict[str, type]]:
+    """Raw columns the analyzer reads and their explicit dtypes, resolved exactly as analyze() does.
+
+    Raises the analyzer's "Missing required columns" ValueError before any rows are parsed.
+    `keep` adds any other columns whose normalized name is one of the given options.
+
+    Correctness and difficulty are read as text, so every parser engine and every chunk sees the
+    same cells. Readers pass the correctness column through infer_text_column afterwards, so it
+    scores exactly as the type-inferred pd.read_csv column did (see there).
+    """
+    header = list(header)
+    column_map = analyzer_cls.resolve_columns(header)
+
+    usecols = list(dict.fromkeys(column_map.values()))
+    test_id_col = analyzer_cls.test_id_column(header)
+    if test_id_col and test_id_col not in usecols:
+        usecols.append(test_id_col)
+    keep = set(keep)
+    usecols.extend(col for col in header if col.lower().strip() in keep and col not in usecols)
+
+    dtypes = {column_map[key]: str for key in ("correct", "difficulty")}
+    return usecols, dtypes
+
+
+def read_attempts_csv(source, analyzer_cls: Type[PerformanceAnalyzer] = PerformanceAnalyzer,
+                      engine: str = None, **read_csv_kwargs) -> pd.DataFrame:
+    """Read only the columns `analyzer_cls` uses, with explicit dtypes and the fastest parser available"""
+    usecols, dtypes = resolve_schema(read_header(source, **read_csv_kwargs), analyzer_cls)
+    engine = engine or CSV_ENGINE
+    inferred = []
+    if engine == "pyarrow":
+        # Given any dtypes, pandas casts the integer columns pyarrow inferred back to int64, which
+        # fails once a cell is blank; the other columns are read as text and inferred here instead
+        inferred = [col for col in usecols if col not in dtypes]
+        dtypes = dict.fromkeys(usecols, str)
+    frame = pd.read_csv(source, usecols=usecols, dtype=dtypes, engine=engine, **read_csv_kwargs)
+    for col in inferred:
+        frame[col] = infer_text_column(frame[col])
+    return _infer_correct(frame, analyzer_cls)
+
+
+def read_attempts(source, filename: str, analyzer_cls: Type[PerformanceAnalyzer] = PerformanceAnalyzer) -> pd.DataFrame:
+    """Read a CSV, Parquet or Arrow upload, picking the reader from the file name"""
+    fmt = file_format(filename)
+    if fmt == "csv":
+        return read_attempts_csv(source, analyzer_cls, compression=file_compression(filename))
+    return read_attempts_columnar(source, fmt, analyzer_cls)
+
+
+def read_attempts_columnar(source, fmt: str, analyzer_cls: Type[PerformanceAnalyzer] = PerformanceAnalyzer) -> pd.DataFrame:
+    """Load only the analyzer's columns from a Parquet or Arrow IPC file; paths are memory-mapped"""
+    if fmt == "parquet":
+        parquet = _open_parquet(source)
+        usecols, dtypes = resolve_schema(parquet.schema_arrow.names, analyzer_cls)
+        table = parquet.read(columns=usecols)
+    else:
+        reader = _open_arrow(source)
+        usecols, dtypes = resolve_schema(reader.schema.names, analyzer_cls)
+        table = reader.read_all().select(usecols)
+    return _infer_correct(_cast_text(table, dtypes).to_pandas(), analyzer_cls)
+
+
+def iter_columnar_batches(source, fmt: str, analyzer_cls: Type[PerformanceAnalyzer] = PerformanceAnalyzer,
+                          keep: Iterable[str] = (), batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """Yield the analyzer's columns from a Parquet or Arrow IPC file one record batch at a time"""
+    if fmt == "parquet":
+        parquet = _open_parquet(source)
+        usecols, dtypes = resolve_schema(parquet.schema_arrow.names, analyzer_cls, keep)
+        batches = parquet.iter_batches(batch_size=batch_size, columns=usecols)
+    else:
+        reader = _open_arrow(source)
+        usecols, dtypes = resolve_schema(reader.schema.names, analyzer_cls, keep)
+        batches = (reader.get_batch(index).select(usecols) for index in range(reader.num_record_batches))
+    for batch in batches:
+        # Parquet batches are already bounded; IPC record batches are sliced (zero-copy) to the same size
+        for offset in range(0, batch.num_rows, batch_size):
+            yield _cast_text(pa.Table.from_batches([batch.slice(offset, batch_size)]), dtypes).to_pandas()
+
+
+def _cast_text(table: "pa.Table", dtypes: Dict[str, type]) -> "pa.Table":
+    """Cast the columns resolve_schema reads as text to strings, so a float 1.0 correctness cell
+    becomes "1" and parses exactly as the same data read from a CSV"""
+    schema = table.schema
+    for name in dtypes:
+        schema = schema.set(schema.get_field_index(name), pa.field(name, pa.string()))
+    return table.cast(schema)
+
+
+def is_numeric_text(values: pd.Series) -> bool:
+    """Whether every present value of a column read as text parses as a number"""
+    present = values.dropna().unique()
+    if not all(isinstance(value, str) for value in present):
+        return False
+    return bool(pd.to_numeric(pd.Series(present, dtype=object), errors="coerce").notna().all())
+
+
+def infer_text_column(values: pd.Series) -> pd.Series:
+    """The column pd.read_csv type inference would have produced from the same text cells.
+
+    A column of numbers is numeric, and float as soon as one cell is blank, so its 1s arrive as 1.0
+    and _to_bool scores them incorrect. Reading correctness as text must not quietly change that.
+    """
+    return pd.to_numeric(values) if is_numeric_text(values) else values
+
+
+class CorrectCells:
+    """Whether a correctness column read as text, chunk by chunk, holds only numbers and a blank.
+
+    That is the one case where infer_text_column depends on the whole column rather than each
+    cell: pd.read_csv makes the column float, and _to_bool scores every cell of it incorrect.
+    """
+
+    def __init__(self):
+        self.numeric = True
+        self.blank = False
+
+    def note(self, values: pd.Series) -> None:
+        if values.dtype == bool or pd.api.types.is_numeric_dtype(values):
+            return
+        self.numeric = self.numeric and is_numeric_text(values)
+        self.blank = self.blank or bool(values.isna().any())
+
+    @property
+    def all_incorrect(self) -> bool:
+        return self.numeric and self.blank
+
+
+def _infer_correct(frame: pd.DataFrame, analyzer_cls: Type[PerformanceAnalyzer]) -> pd.DataFrame:
+    column = analyzer_cls.resolve_columns(frame.columns)["correct"]
+    frame[column] = infer_text_column(frame[column])
+    return frame
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ValueError("Parquet and Arrow uploads require pyarrow (pip install pyarrow)")
+
+
+def _open_parquet(source):
+    _require_pyarrow()
+    return pq.ParquetFile(source, memory_map=isinstance(source, str))
+
+
+def _open_arrow(source):
+    _require_pyarrow()
+    return pa.ipc.open_file(pa.memory_map(source) if isinstance(source, str) else source)
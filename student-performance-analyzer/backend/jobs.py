@@ -0,0 +1,205 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+TERMINAL_STATES = ("succeeded", "failed")
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while max_pending jobs are already waiting or running"""
+
+
+class Job:
+    """One unit of background work and its outcome: a JSON-ready payload plus an HTTP status.
+
+    Work can also `report` named stages with partial results while it runs.
+    """
+
+    def __init__(self, kind: str, changed: threading.Condition):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.payload: Optional[Dict] = None
+        self.status_code: Optional[int] = None
+        self.stages: List[Tuple[str, Dict]] = []
+        self._changed = changed
+        # Set when submitted with a key; unfinished jobs with the same key are shared
+        self.key: Optional[str] = None
+        # Bumped on every state change, so watchers can tell whether anything happened
+        self.version = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    def report(self, stage: str, data: Dict) -> None:
+        """Record a finished stage's partial result and wake anyone watching the job"""
+        with self._changed:
+            self.stages.append((stage, data))
+            self.version += 1
+            self._changed.notify_all()
+
+    def to_dict(self, include_result: bool = True) -> Dict:
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "queue_seconds": _elapsed(self.created_at, self.started_at),
+            "run_seconds": _elapsed(self.started_at, self.finished_at),
+            "stages": [stage for stage, _ in self.stages],
+        }
+        if self.done:
+            data["status_code"] = self.status_code
+            if include_result:
+                data["result"] = self.payload
+        return data
+
+
+class JobQueue:
+    """Bounded thread pool for slow requests, with pollable job records and latency stats.
+
+    `fn` passed to submit is called as fn(job, *args), may call job.report as it goes, and
+    returns (payload, status_code); an exception fails the job with `on_error(exc)` as its
+    payload. submit_or_join hands back the unfinished job already submitted under a key, so
+    identical work queued twice runs once. Finished jobs are kept for `retention_seconds` (at most `max_finished` of them)
+    so clients can collect results.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 32, retention_seconds: float = 3600,
+                 max_finished: int = 256, window: int = 1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._changed = threading.Condition()
+        self._pending = 0
+        self._running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.failed = 0
+        self.coalesced = 0
+        # key -> unfinished job submitted under it
+        self._active: Dict[str, Job] = {}
+        # (queue seconds, run seconds) of recently finished jobs
+        self._latencies: deque = deque(maxlen=window)
+
+    def submit(self, kind: str, fn: Callable, *args, on_error: Callable = None) -> Job:
+        return self._submit(None, kind, fn, args, on_error)[0]
+
+    def submit_or_join(self, key: str, kind: str, fn: Callable, *args, on_error: Callable = None) -> Tuple[Job, bool]:
+        """(job, created): the unfinished job submitted under `key` if there is one, else a new one"""
+        return self._submit(key, kind, fn, args, on_error)
+
+    def _submit(self, key: Optional[str], kind: str, fn: Callable, args: tuple,
+                on_error: Optional[Callable]) -> Tuple[Job, bool]:
+        with self._changed:
+            if key is not None and key in self._active:
+                self.coalesced += 1
+                return self._active[key], False
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{self._pending} jobs already pending")
+            self._prune()
+            job = Job(kind, self._changed)
+            self._jobs[job.id] = job
+            if key is not None:
+                job.key = key
+                self._active[key] = job
+            self._pending += 1
+            self.submitted += 1
+        self._executor.submit(self._run, job, fn, args, on_error)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def wait(self, job: Job, version: int, timeout: float) -> bool:
+        """Block until `job` changes past `version` or `timeout` passes; True if it changed"""
+        with self._changed:
+            return self._changed.wait_for(lambda: job.version != version, timeout=timeout)
+
+    def stats(self) -> Dict:
+        with self._changed:
+            latencies = list(self._latencies)
+            stats = {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "queued": self._pending - self._running,
+                "running": self._running,
+                "submitted": self.submitted,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "coalesced": self.coalesced,
+                "retained": len(self._jobs),
+            }
+        for index, name in enumerate(("queue_seconds", "run_seconds")):
+            values = sorted(latency[index] for latency in latencies)
+            stats[name] = {
+                "avg": round(sum(values) / len(values), 4) if values else 0.0,
+                "p50": _percentile(values, 0.50),
+                "p95": _percentile(values, 0.95),
+                "max": round(values[-1], 4) if values else 0.0,
+            }
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable, args: tuple, on_error: Optional[Callable]) -> None:
+        self._update(job, status="running", started_at=time.time())
+        try:
+            payload, status_code = fn(job, *args)
+            status = "succeeded" if status_code < 400 else "failed"
+        except Exception as e:
+            if on_error is None:
+                payload, status_code = {"error": str(e)}, 500
+            else:
+                payload, status_code = on_error(e)
+            status = "failed"
+        self._update(job, status=status, finished_at=time.time(), payload=payload, status_code=status_code)
+
+    def _update(self, job: Job, **changes) -> None:
+        with self._changed:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            if job.status == "running":
+                self._running += 1
+            elif job.done:
+                self._running -= 1
+                self._pending -= 1
+                self.failed += job.status == "failed"
+                if job.key is not None and self._active.get(job.key) is job:
+                    del self._active[job.key]
+                self._latencies.append((job.started_at - job.created_at, job.finished_at - job.started_at))
+            self._changed.notify_all()
+
+    def _prune(self) -> None:
+        """Forget finished jobs past retention, oldest first; called with the lock held"""
+        cutoff = time.time() - self.retention_seconds
+        finished = [job for job in self._jobs.values() if job.done]
+        for index, job in enumerate(finished):
+            if job.finished_at < cutoff or len(finished) - index > self.max_finished:
+                del self._jobs[job.id]
+
+
+def _elapsed(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None:
+        return None
+    return round((end or time.time()) - start, 4)
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 4)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+"""Bulk loader for attempt CSVs into the SQLite questions table.
+
+Usage:
+    python loader.py ../data/*.csv
+    python loader.py term1.csv term2.csv --db student.db --batch-size 20000
+"""
+
+import argparse
+import gzip
+import io
+import logging
+import sqlite3
+import time
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import pandas as pd
+
+import aggregates
+from analyzer import PerformanceAnalyzer
+from cohort import CohortAnalyzer
+from db import DB_PATH, connect
+from ingest import CorrectCells
+
+logger = logging.getLogger(__name__)
+
+QUESTION_COLUMNS = [
+    'question_id', 'student_id', 'test_id', 'subject', 'topic', 'subtopic',
+    'difficulty_level', 'is_correct', 'time_taken', 'topic_weightage',
+]
+
+INDEXES = {
+    'idx_questions_student_test_subtopic': 'questions (student_id, test_id, subtopic)',
+    'idx_questions_test': 'questions (test_id)',
+}
+
+
+# An attempt is one student's answer to one question in one test; re-loading it replaces the row
+ATTEMPT_KEY = ['student_id', 'test_id', 'question_id']
+
+QUESTIONS_TABLE = f'''
+    CREATE TABLE IF NOT EXISTS questions (
+        question_id TEXT NOT NULL,
+        student_id TEXT NOT NULL DEFAULT '',
+        test_id TEXT NOT NULL DEFAULT '',
+        subject TEXT,
+        topic TEXT,
+        subtopic TEXT,
+        difficulty_level TEXT,
+        is_correct INTEGER,
+        time_taken INTEGER,
+        topic_weightage TEXT,
+        PRIMARY KEY ({", ".join(ATTEMPT_KEY)})
+    )
+'''
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """Create the questions and uploads tables and indexes, migrating tables from older databases"""
+    conn.execute(QUESTIONS_TABLE)
+    columns = list(conn.execute('PRAGMA table_info(questions)'))
+    key = [row[1] for row in sorted(columns, key=lambda row: row[5]) if row[5]]
+    if key != ATTEMPT_KEY:
+        _rekey_questions(conn, {row[1] for row in columns})
+    for name, target in INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target}')
+    # One row per loaded file, so re-loading identical bytes is skipped
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS uploads (
+            content_hash TEXT PRIMARY KEY,
+            filename TEXT,
+            rows INTEGER NOT NULL,
+            loaded_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def _rekey_questions(conn: sqlite3.Connection, existing: set) -> None:
+    """Copy a questions table keyed by question_id alone (where students overwrote each other) into
+    one keyed by ATTEMPT_KEY. Row ids change, so the aggregates are dropped to be rebuilt."""
+    logger.info(f"Rekeying questions by ({', '.join(ATTEMPT_KEY)})")
+    copied = [
+        f"COALESCE({name}, '')" if name in ATTEMPT_KEY and name in existing else name if name in existing else "''"
+        for name in QUESTION_COLUMNS
+    ]
+    conn.commit()
+    conn.execute('BEGIN')
+    try:
+        conn.execute('ALTER TABLE questions RENAME TO questions_old')
+        for name in INDEXES:
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+        conn.execute(QUESTIONS_TABLE)
+        conn.execute(f'''
+            INSERT OR REPLACE INTO questions ({", ".join(QUESTION_COLUMNS)})
+            SELECT {", ".join(copied)} FROM questions_old ORDER BY rowid
+        ''')
+        conn.execute('DROP TABLE questions_old')
+        aggregates.drop(conn)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def is_loaded(conn: sqlite3.Connection, content_hash: str) -> bool:
+    return conn.execute('SELECT 1 FROM uploads WHERE content_hash = ?', (content_hash,)).fetchone() is not None
+
+
+class BulkLoader:
+    """Loads attempt CSVs with batched executemany calls, one transaction per file.
+
+    Batches are staged in a temp table and written together, so the materialized aggregates in
+    aggregates.py are updated once per file, within the same transaction.
+    """
+
+    DEFAULT_BATCH_SIZE = 10_000
+
+    def __init__(self, db_path: str = DB_PATH, batch_size: int = DEFAULT_BATCH_SIZE,
+                 conn: Optional[sqlite3.Connection] = None):
+        """Opens its own connection and sets up the schema, unless given `conn` to borrow.
+
+        A borrowed connection (such as one from db.ConnectionPool) is left open on close, and its
+        database must already have the schema, e.g. from app.init_db at startup.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.owns_conn = conn is None
+        if conn is None:
+            # Transactions are begun and committed explicitly so a whole file commits or rolls back
+            # together; autocommit keeps the schema setup from opening one implicitly
+            conn = connect(db_path, isolation_level=None)
+            ensure_schema(conn)
+            aggregates.ensure_schema(conn)
+        self.conn = conn
+        # Staging table for one file, so aggregates can be updated set-wise around the upsert
+        self.conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS incoming ({", ".join(QUESTION_COLUMNS)})')
+        self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS replaced (row_id INTEGER PRIMARY KEY)')
+
+    def close(self) -> None:
+        if self.owns_conn:
+            self.conn.close()
+
+    def __enter__(self) -> 'BulkLoader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def load_csv(self, csv_path: str, compression: Optional[str] = None, content_hash: Optional[str] = None) -> int:
+        """Insert or replace every row of one CSV; returns the number of rows written"""
+        with open(csv_path, 'rb') as stream:
+            return self.load_stream(stream, compression, content_hash, csv_path)
+
+    def load_stream(self, stream: BinaryIO, compression: Optional[str] = None, content_hash: Optional[str] = None,
+                    filename: Optional[str] = None, student_id: Optional[str] = None) -> int:
+        """Insert or replace every row of a binary CSV stream (optionally gzip/zstd) in one transaction.
+
+        With a content_hash, a file already recorded in uploads is skipped (returning 0) and a new
+        one is recorded in the same transaction as its rows, so a retried load is idempotent.
+        With a student_id, every row is stored for that student; the file may omit the student
+        column, but a row naming another student fails the whole load with a ValueError.
+        """
+        if content_hash and is_loaded(self.conn, content_hash):
+            logger.info(f"Skipping {filename or content_hash}: already loaded")
+            return 0
+        csvfile = _text_stream(stream, compression)
+        # Take the write lock up front: a deferred transaction that read first can't upgrade once
+        # a concurrent load has committed, and would fail without waiting out the busy timeout
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            self.conn.execute('DELETE FROM temp.incoming')
+            rows = 0
+            correct_cells = CorrectCells()
+            for batch in self.batches(csvfile, student_id, correct_cells):
+                self._stage_batch(batch)
+                rows += len(batch)
+            if correct_cells.all_incorrect:
+                # Scored per batch, these were 1s; the whole file analyzes them all as incorrect
+                self.conn.execute('UPDATE temp.incoming SET is_correct = 0')
+            if rows:
+                self._write_staged()
+            # A file that stored nothing isn't recorded, so it is read again if it is uploaded again
+            if content_hash and rows:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO uploads (content_hash, filename, rows) VALUES (?, ?, ?)',
+                    (content_hash, filename, rows),
+                )
+            self.conn.execute('COMMIT')
+        except Exception:
+            self.conn.execute('ROLLBACK')
+            raise
+        finally:
+            # The caller owns the binary stream; detaching keeps the wrapper from closing it
+            csvfile.detach()
+        return rows
+
+    def load_files(self, paths: Iterable[str]) -> List[Dict]:
+        """Load each CSV in turn, returning rows, seconds and rows/second per file"""
+        stats = []
+        for path in paths:
+            start = time.perf_counter()
+            rows = self.load_csv(path)
+            seconds = time.perf_counter() - start
+            stats.append({
+                'path': path,
+                'rows': rows,
+                'seconds': round(seconds, 3),
+                'rows_per_second': round(rows / seconds) if seconds else rows,
+            })
+            logger.info(f"Loaded {rows} rows from {path} ({stats[-1]['rows_per_second']} rows/s)")
+        return stats
+
+    def batches(self, csvfile: TextIO, student_id: Optional[str] = None,
+                correct_cells: Optional[CorrectCells] = None) -> Iterator[List[Tuple]]:
+        """Row tuples in QUESTION_COLUMNS order, parsed batch_size CSV rows at a time.
+
+        `correct_cells` notes every raw correctness cell, including those of skipped rows.
+        """
+        try:
+            # Everything is read as text, with the missing-value spellings pandas reads for analyze();
+            # records() parses the typed columns
+            chunks = pd.read_csv(csvfile, dtype=str, chunksize=self.batch_size)
+        except pd.errors.EmptyDataError:
+            return
+        with chunks:
+            for chunk in chunks:
+                if correct_cells is not None:
+                    correct_cells.note(chunk[PerformanceAnalyzer.resolve_columns(chunk.columns)['correct']])
+                batch = self.records(chunk, student_id)
+                if batch:
+                    yield batch
+
+    @staticmethod
+    def records(frame: pd.DataFrame, student_id: Optional[str] = None) -> List[Tuple]:
+        """Row tuples in QUESTION_COLUMNS order from a frame of raw CSV text.
+
+        Headers resolve through the analyzer's column aliases and correctness and time are parsed
+        by its normalizers, so stored attempts clean exactly as the uploaded file analyzes. Missing
+        cells are stored as NULL, or as '' in the key columns. Rows without a question id have no
+        attempt key and are skipped.
+        """
+        column_map = PerformanceAnalyzer.resolve_columns(frame.columns)
+        lower_map = {col.lower().strip(): col for col in frame.columns}
+        # The analyzer accepts question text as the question column; an id column is the better key
+        question_col = lower_map.get('question_id', column_map['question'])
+        frame = frame[frame[question_col].notna()]
+        student_col = CohortAnalyzer.student_column(frame.columns)
+        if student_id is not None and student_col is not None:
+            named = frame[student_col]
+            if (named.notna() & (named != student_id)).any():
+                raise ValueError(f"New attempts include rows for students other than {student_id}")
+
+        def text(column: Optional[str], default: Optional[str] = None) -> List[Optional[str]]:
+            if not column:
+                return [default] * len(frame)
+            values = frame[column].astype(object)
+            return values.where(values.notna(), default).tolist()
+
+        correct = PerformanceAnalyzer._normalize_correct(frame[column_map['correct']]).astype(int)
+        time_taken = pd.to_numeric(frame[column_map['time_seconds']], errors='coerce')
+        weightage_col = column_map.get('topic_weightage')
+        weightage = frame[weightage_col].str.strip().str.lower().fillna('low') if weightage_col else None
+        return list(zip(
+            text(question_col),
+            text(student_col, '') if student_id is None else [student_id] * len(frame),
+            text(PerformanceAnalyzer.test_id_column(frame.columns), ''),
+            text(lower_map.get('subject')),
+            text(column_map['topic']),
+            text(column_map['subtopic']),
+            text(column_map['difficulty']),
+            correct.tolist(),
+            # Unparseable times are stored as NULL, which the SQL cleaning rejects as missing
+            time_taken.astype(object).where(time_taken.notna(), None).tolist(),
+            weightage.tolist() if weightage is not None else ['low'] * len(frame),
+        ))
+
+    def _stage_batch(self, batch: List[Tuple]) -> None:
+        columns = ', '.join(QUESTION_COLUMNS)
+        placeholders = ', '.join('?' for _ in QUESTION_COLUMNS)
+        self.conn.executemany(f'INSERT INTO temp.incoming ({columns}) VALUES ({placeholders})', batch)
+
+    def _write_staged(self) -> None:
+        """Upsert the staged file into questions, keeping the materialized aggregates current.
+
+        The aggregates are updated with one GROUP BY over the whole file rather than one per batch,
+        and both sides select rows by rowid instead of matching every staged key again.
+        """
+        columns = ', '.join(QUESTION_COLUMNS)
+        same_key = ' AND '.join(f'q.{name} = i.{name}' for name in ATTEMPT_KEY)
+        self.conn.execute('DELETE FROM temp.replaced')
+        self.conn.execute(f'INSERT OR IGNORE INTO temp.replaced SELECT q.rowid FROM temp.incoming AS i JOIN questions AS q ON {same_key}')
+        replaced = 'rowid IN (SELECT row_id FROM temp.replaced)'
+
+        # Rows about to be replaced leave the aggregates first; the written rows are then added
+        replacing = self.conn.execute('SELECT 1 FROM temp.replaced LIMIT 1').fetchone() is not None
+        if replacing:
+            aggregates.apply(self.conn, replaced, sign=-1)
+        last_row = self.conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM questions').fetchone()[0]
+        # Replaced rows are updated in place, keeping their rowid and so their place in first-seen
+        # order; new rows are appended after every existing row
+        updates = ', '.join(f'{name} = excluded.{name}' for name in QUESTION_COLUMNS if name not in ATTEMPT_KEY)
+        self.conn.execute(f'''
+            INSERT INTO questions ({columns}) SELECT {columns} FROM temp.incoming WHERE true ORDER BY rowid
+            ON CONFLICT ({', '.join(ATTEMPT_KEY)}) DO UPDATE SET {updates}
+        ''')
+        written = f'rowid > ? OR {replaced}' if replacing else 'rowid > ?'
+        aggregates.apply(self.conn, written, [last_row], sign=1)
+        if replacing:
+            aggregates.relabel(self.conn)
+
+
+def _text_stream(stream: BinaryIO, compression: Optional[str]) -> io.TextIOWrapper:
+    """Text view of a binary CSV stream, decompressing the pandas compression names ingest uses"""
+    if compression == 'gzip':
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+    elif compression == 'zstd':
+        import zstandard
+        stream = zstandard.ZstdDecompressor().stream_reader(stream, closefd=False)
+    elif compression:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv_files', nargs='+')
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--batch-size', type=int, default=BulkLoader.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    total_rows, total_seconds = 0, 0.0
+    with BulkLoader(args.db, args.batch_size) as loader:
+        for stat in loader.load_files(args.csv_files):
+            print(f"{stat['path']}: {stat['rows']:,} rows in {stat['seconds']:.3f}s ({stat['rows_per_second']:,} rows/s)")
+            total_rows += stat['rows']
+            total_seconds += stat['seconds']
+    if len(args.csv_files) > 1 and total_seconds:
+        print(f"total: {total_rows:,} rows in {total_seconds:.3f}s ({round(total_rows / total_seconds):,} rows/s)")
@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from cohort import CohortAnalyzer
+from ingest import pa
+
+# Worker processes are started by a fork server (or spawned where there is none), never forked
+# from the server itself: a fork copies whatever locks its request threads hold at that moment.
+# The server preloads the analysis modules, so each worker starts with pandas already imported.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+PRELOAD_MODULES = ["analyzer", "cohort", "ingest"]
+
+# Shards are handed to workers as an Arrow IPC file, in shared memory where the platform has it
+SHARD_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def shared_pool(workers: int) -> ProcessPoolExecutor:
+    """The process pool with `workers` processes, created on first use and kept for the process lifetime"""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            context = multiprocessing.get_context(START_METHOD)
+            if START_METHOD == "forkserver":
+                context.set_forkserver_preload(PRELOAD_MODULES)
+            pool = _pools[workers] = ProcessPoolExecutor(workers, mp_context=context)
+        return pool
+
+
+def pool_map(workers: int, fn: Callable, *iterables: Iterable) -> List:
+    """list(map(fn, *iterables)) across shared_pool(workers); a pool broken by a worker that died
+    is dropped, so the next call gets a fresh one"""
+    pool = shared_pool(workers)
+    try:
+        return list(pool.map(fn, *iterables))
+    except BrokenProcessPool:
+        with _pools_lock:
+            if _pools.get(workers) is pool:
+                del _pools[workers]
+        pool.shutdown(wait=False)
+        raise
+
+
+class ShardedCohortAnalyzer:
+    """Runs CohortAnalyzer on student_id hash shards in the shared process pool and merges the results.
+
+    Every student's rows land in exactly one shard, so per-student results are the same as a
+    single CohortAnalyzer pass; only the cohort summary and cleaning report are combined.
+    """
+
+    def __init__(self, df: pd.DataFrame, workers: Optional[int] = None):
+        self.df = df
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.analysis_results = {}
+
+    def analyze(self) -> Dict:
+        """Cohort analysis in the same shape as CohortAnalyzer.analyze"""
+        if self.workers == 1:
+            self.analysis_results = CohortAnalyzer(self.df).analyze()
+            return self.analysis_results
+
+        student_col = CohortAnalyzer.student_column(self.df.columns)
+        if student_col is None:
+            raise ValueError("Missing required columns: student_id")
+        shard_ids = self.shard_ids(self.df[student_col], self.workers)
+
+        results, total_attempts, correct = [], 0, 0
+        report = {"input_rows": 0, "valid_rows": 0, "rejected": {}}
+        for shard_results, shard_report, shard_correct in self._run_shards(shard_ids):
+            results.extend(shard_results)
+            total_attempts += shard_report["valid_rows"]
+            correct += shard_correct
+            report["input_rows"] += shard_report["input_rows"]
+            report["valid_rows"] += shard_report["valid_rows"]
+            for name, count in shard_report["rejected"].items():
+                report["rejected"][name] = report["rejected"].get(name, 0) + count
+
+        if not results:
+            raise ValueError("No valid attempts after cleaning. Check your CSV values.")
+
+        # Category codes sort student ids by value, so sorting by value restores the single-pass order
+        results.sort(key=lambda result: result["student_id"])
+        self.analysis_results = {
+            "cohort_summary": CohortAnalyzer._cohort_summary(results, total_attempts, correct),
+            "students": results,
+            "data_quality": report,
+        }
+        return self.analysis_results
+
+    @staticmethod
+    def shard_ids(student_ids: pd.Series, shards: int) -> np.ndarray:
+        """Stable shard number per row from a hash of its student id"""
+        hashes = pd.util.hash_pandas_object(student_ids, index=False).to_numpy()
+        return (hashes % np.uint64(shards)).astype(np.int32)
+
+    def _run_shards(self, shard_ids: np.ndarray) -> List[Tuple[List[Dict], Dict, int]]:
+        # Workers aren't forked from this process, so each task is sent its shard's rows
+        frames = [self.df[shard_ids == shard] for shard in range(self.workers) if (shard_ids == shard).any()]
+        if pa is not None:
+            with tempfile.TemporaryDirectory(dir=SHARD_DIR) as directory:
+                path = os.path.join(directory, "shards.arrow")
+                if _write_shards(path, frames):
+                    return pool_map(self.workers, _analyze_shard_batch, [path] * len(frames), range(len(frames)))
+        # Without pyarrow, or for columns Arrow can't hold, each task pickles its shard instead
+        return pool_map(self.workers, _analyze_shard, frames)
+
+
+def _write_shards(path: str, frames: List[pd.DataFrame]) -> bool:
+    """Write each shard as one record batch of an Arrow IPC file; False if a column can't be converted.
+
+    Pickling sends every shard through a pipe and rebuilds it from a copy in the worker; a worker
+    memory-maps its record batch instead, so only the path and batch number are pickled.
+    """
+    try:
+        schema = pa.Schema.from_pandas(frames[0], preserve_index=False)
+        batches = [pa.RecordBatch.from_pandas(frame, schema=schema, preserve_index=False) for frame in frames]
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return False
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+    return True
+
+
+def _analyze_shard_batch(path: str, index: int) -> Tuple[List[Dict], Dict, int]:
+    with pa.memory_map(path) as source:
+        df = pa.ipc.open_file(source).get_batch(index).to_pandas()
+    return _analyze_shard(df)
+
+
+def _analyze_shard(df: pd.DataFrame) -> Tuple[List[Dict], Dict, int]:
+    """Per-student results, cleaning report and correct count for one shard of raw rows"""
+    analyzer = CohortAnalyzer(df)
+    analyzer._normalize_columns()
+    # A shard may be all invalid rows even when the whole file is not, so empty is allowed here
+    analyzer._validate_and_clean_data(allow_empty=True)
+    if analyzer.df.empty:
+        return [], analyzer.cleaning_report, 0
+    return analyzer._student_results(), analyzer.cleaning_report, int(analyzer.df["correct"].sum())
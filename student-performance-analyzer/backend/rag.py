@@ -1,7 +1,7 @@
 import json
 import os
 import re
-from typing import Dict, List
+from typing import Dict, List, Set, Tuple
 
 
 STOPWORDS = {
@@ -30,6 +30,8 @@ class ResourceRetriever:
 
     def __init__(self, resources: List[Dict[str, str]]):
         self.resources = resources
+        # Resource token sets are computed once, so one retriever can serve every request
+        self._indexed = [(resource, self._resource_tokens(resource)) for resource in resources]
 
     @classmethod
     def from_file(cls, path: str) -> "ResourceRetriever":
@@ -38,11 +40,11 @@ class ResourceRetriever:
         return cls(data)
 
     def retrieve(self, topic: str, subtopic: str, top_k: int = 3) -> List[Dict[str, str]]:
-        query_tokens = self._tokenize(f"{topic} {subtopic}")
+        query_tokens = set(self._tokenize(f"{topic} {subtopic}"))
         scored = []
 
-        for resource in self.resources:
-            score = self._score_resource(resource, query_tokens)
+        for resource, tokens in self._indexed:
+            score = self._score_tokens(tokens, query_tokens)
             if score > 0:
                 scored.append((score, resource))
 
@@ -50,11 +52,17 @@ class ResourceRetriever:
         results = [item[1] for item in scored[:top_k]]
         return [self._format_resource(resource) for resource in results]
 
-    def _score_resource(self, resource: Dict[str, str], query_tokens: List[str]) -> int:
-        title_tokens = self._tokenize(resource.get("name", ""))
-        topic_tokens = self._tokenize(resource.get("topic", ""))
-        subtopic_tokens = self._tokenize(resource.get("subtopic", ""))
-        tag_tokens = self._tokenize(" ".join(resource.get("tags", [])))
+    def _resource_tokens(self, resource: Dict[str, str]) -> Tuple[Set[str], Set[str], Set[str], Set[str]]:
+        """(tag, title, topic, subtopic) token sets of one resource"""
+        return (
+            set(self._tokenize(" ".join(resource.get("tags", [])))),
+            set(self._tokenize(resource.get("name", ""))),
+            set(self._tokenize(resource.get("topic", ""))),
+            set(self._tokenize(resource.get("subtopic", ""))),
+        )
+
+    def _score_tokens(self, tokens: Tuple[Set[str], ...], query_tokens: Set[str]) -> int:
+        tag_tokens, title_tokens, topic_tokens, subtopic_tokens = tokens
 
         score = 0
         score += 3 * self._overlap(query_tokens, tag_tokens)
@@ -63,8 +71,8 @@ class ResourceRetriever:
         score += 2 * self._overlap(query_tokens, subtopic_tokens)
         return score
 
-    def _overlap(self, query_tokens: List[str], tokens: List[str]) -> int:
-        return len(set(query_tokens) & set(tokens))
+    def _overlap(self, query_tokens: Set[str], tokens: Set[str]) -> int:
+        return len(query_tokens & tokens)
 
     def _tokenize(self, text: str) -> List[str]:
         tokens = re.findall(r"[a-z0-9]+", text.lower())
@@ -1,5 +1,5 @@
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from rag import ResourceRetriever, get_default_resource_path
 
@@ -58,10 +58,10 @@ class StudyMaterialRecommender:
         ]
     }
     
-    def __init__(self) -> None:
-        self.retriever = None
+    def __init__(self, retriever: Optional[ResourceRetriever] = None) -> None:
+        self.retriever = retriever
         resource_path = get_default_resource_path()
-        if os.path.exists(resource_path):
+        if self.retriever is None and os.path.exists(resource_path):
             self.retriever = ResourceRetriever.from_file(resource_path)
 
     def recommend_materials(self, ranked_subtopics: List[Dict], topics: List[str]) -> Dict:
@@ -0,0 +1,111 @@
+import dataclasses
+import datetime
+import decimal
+import gzip
+import uuid
+from typing import Any, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content-Encodings this server can produce, most preferred first
+ENCODINGS = (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def to_builtin(obj: Any) -> Any:
+    """JSON-ready form of the values either encoder can't serialize itself: NumPy/pandas scalars and
+    arrays plus the types Flask's default provider accepts (dates, decimals, UUIDs, dataclasses)"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return obj.tolist()
+    if isinstance(obj, (datetime.date, datetime.time)):
+        # ISO 8601 as orjson writes natively, rather than Flask's HTTP date, so both encoders agree
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is installed, else the stdlib encoder.
+
+    Keys stay sorted and output stays compact outside debug mode, as with jsonify. orjson writes
+    UTF-8 rather than \\u escapes and NaN/Infinity as null (the stdlib emits bare NaN, which
+    isn't valid JSON); otherwise both encoders produce the same documents.
+    """
+
+    default = staticmethod(to_builtin)
+
+    def __init__(self, app, backend: Optional[str] = None):
+        super().__init__(app)
+        if backend is None:
+            backend = "orjson" if orjson is not None else "stdlib"
+        if backend == "orjson" and orjson is None:
+            raise ValueError("JSON backend 'orjson' requested but orjson is not installed")
+        if backend not in ("orjson", "stdlib"):
+            raise ValueError(f"Unknown JSON backend: {backend}")
+        self.backend = backend
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if self.backend == "stdlib":
+            return super().dumps(obj, **kwargs)
+        return self._dump_bytes(obj, indent=bool(kwargs.get("indent"))).decode("utf-8")
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if self.backend == "stdlib" or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if self.backend == "stdlib":
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        # Bytes straight into the response, skipping the str round trip
+        return self._app.response_class(self._dump_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
+
+    def _dump_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=to_builtin, option=option)
+
+
+def negotiate_encoding(accept_encodings, available: Sequence[str] = ENCODINGS) -> Optional[str]:
+    """The client's preferred encoding among `available` from a parsed Accept-Encoding header, or None"""
+    return accept_encodings.best_match(available)
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    """Compress a response body. The defaults favour speed, since bodies are compressed per request."""
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    if encoding == "gzip":
+        # mtime=0 keeps the output a function of the body alone, so compressed ETags stay stable
+        return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
@@ -0,0 +1,169 @@
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from analyzer import PerformanceAnalyzer
+from ingest import is_numeric_text
+from streaming import StreamingAnalyzer
+
+# Rejection reasons in the order PerformanceAnalyzer._validate_and_clean_data attributes them
+REJECTION_REASONS = [f"missing_{column}" for column in PerformanceAnalyzer.CLEANING_COLUMNS]
+REJECTION_REASONS += ["negative_time", "invalid_difficulty"]
+
+
+def cleaned_cte(conn: sqlite3.Connection, where: str, params: Sequence = ()) -> Tuple[str, List]:
+    """WITH clause over the questions rows matching `where`, plus its parameters.
+
+    `cleaned` has the canonical analyzer columns and a `rejection` reason (NULL when the row is
+    valid); `valid` keeps the rows that pass. Difficulty spellings are mapped in Python once per
+    distinct value, like _normalize_difficulty_column, and inlined as a CASE: NULL is missing
+    (including unparseable spellings, as in pandas), 0 is a number outside 1-3.
+    """
+    levels = _difficulty_levels(conn, where, params)
+    difficulty = "NULL"
+    if levels:
+        difficulty = f"CASE NULLIF(difficulty_level, '') {' '.join('WHEN ? THEN ?' for _ in levels)} ELSE NULL END"
+    level_params = [item for pair in levels.items() for item in pair]
+
+    missing = " ".join(
+        f"WHEN {column} IS NULL THEN 'missing_{column}'" for column in PerformanceAnalyzer.CLEANING_COLUMNS
+    )
+    # Older loads stored empty CSV fields as '', which pandas reads as missing
+    cte = f"""
+        WITH cleaned AS (
+            SELECT *,
+                   CASE {missing}
+                        WHEN time_seconds < 0 THEN 'negative_time'
+                        WHEN difficulty = 0 THEN 'invalid_difficulty'
+                   END AS rejection
+            FROM (
+                SELECT rowid AS row_order,
+                       student_id,
+                       is_correct = 1 AS correct,
+                       time_taken AS time_seconds,
+                       {difficulty} AS difficulty,
+                       NULLIF(topic, '') AS topic,
+                       NULLIF(subtopic, '') AS subtopic,
+                       COALESCE(topic_weightage = 'high', 0) AS is_high,
+                       NULLIF(test_id, '') AS test_id
+                FROM questions WHERE {where}
+            )
+        ), valid AS (
+            SELECT * FROM cleaned WHERE rejection IS NULL
+        )
+    """
+    return cte, level_params + list(params)
+
+
+def _difficulty_levels(conn: sqlite3.Connection, where: str, params: Sequence) -> Dict[str, Optional[int]]:
+    """Level for each distinct non-empty stored spelling: 1-3, 0 if out of range, None if not numeric"""
+    values = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT difficulty_level FROM questions WHERE ({where}) AND NULLIF(difficulty_level, '') IS NOT NULL",
+        params,
+    )]
+    numeric = PerformanceAnalyzer._normalize_difficulty_column(pd.Series(values, dtype=object))
+    return {
+        value: None if pd.isna(level) else int(level) if level in (1, 2, 3) else 0
+        for value, level in zip(values, numeric.tolist())
+    }
+
+
+class SQLAnalyzer(StreamingAnalyzer):
+    """Builds the StreamingAnalyzer tallies with GROUP BY queries over the questions table.
+
+    Cleaning is expressed in SQL with the same rules and rejection order as
+    PerformanceAnalyzer._validate_and_clean_data, so only per-key aggregates leave SQLite and
+    result() returns the same analysis as analyze() on the stored rows.
+    """
+
+    # Attempts can be selected by student or by test; each filter has an index from loader.INDEXES
+    FILTER_COLUMNS = {"student": "student_id", "test": "test_id"}
+
+    def __init__(self, conn: sqlite3.Connection, filter_by: str, value: str):
+        super().__init__()
+        if filter_by not in self.FILTER_COLUMNS:
+            raise ValueError(f"Unsupported filter: {filter_by}")
+        self.conn = conn
+        self.filter_column = self.FILTER_COLUMNS[filter_by]
+        self.value = value
+        self.test_id_col = "test_id"
+
+    @classmethod
+    def for_student(cls, conn: sqlite3.Connection, student_id: str) -> "SQLAnalyzer":
+        analyzer = cls(conn, "student", student_id)
+        analyzer.load()
+        return analyzer
+
+    @classmethod
+    def for_test(cls, conn: sqlite3.Connection, test_id: str) -> "SQLAnalyzer":
+        analyzer = cls(conn, "test", test_id)
+        analyzer.load()
+        return analyzer
+
+    def load(self) -> None:
+        """Run the cleaning and aggregate queries and store their results as tallies"""
+        cte, params = cleaned_cte(self.conn, f"{self.filter_column} = ?", [self.value])
+
+        counts = dict(self.conn.execute(f"{cte} SELECT rejection, COUNT(*) FROM cleaned GROUP BY rejection", params))
+        valid_rows = counts.pop(None, 0)
+        rejected = {name: counts.get(name, 0) for name in REJECTION_REASONS}
+        self.cleaning_report = {
+            "input_rows": valid_rows + sum(rejected.values()),
+            "valid_rows": valid_rows,
+            "rejected": rejected,
+        }
+
+        queries = {
+            "overall": """
+                SELECT 'all', COUNT(*), SUM(correct), SUM(time_seconds),
+                       SUM(CASE WHEN correct THEN time_seconds ELSE 0 END),
+                       SUM(CASE WHEN correct THEN 0 ELSE time_seconds END)
+                FROM valid HAVING COUNT(*) > 0
+            """,
+            "difficulties": "SELECT difficulty, COUNT(*), SUM(correct) FROM valid GROUP BY difficulty",
+            "subtopics": """
+                SELECT subtopic, COUNT(*), SUM(correct), SUM(time_seconds),
+                       SUM(CASE WHEN correct THEN 0 ELSE time_seconds END), SUM(difficulty), SUM(is_high)
+                FROM valid GROUP BY subtopic
+            """,
+            "topics": "SELECT topic, COUNT(*), SUM(correct), SUM(difficulty), SUM(is_high) FROM valid GROUP BY topic",
+            "tests": """
+                SELECT test_id, COUNT(*), SUM(correct), SUM(time_seconds),
+                       SUM(difficulty = 3), SUM(difficulty = 3 AND correct)
+                FROM valid WHERE test_id IS NOT NULL GROUP BY test_id
+            """,
+        }
+        for name, query in queries.items():
+            rows = self.conn.execute(f"{cte} {query}", params).fetchall()
+            self.tallies[name] = {row[0]: list(row[1:]) for row in rows}
+
+        # SQLite takes bare columns from the MIN(row_order) row, i.e. the first topic seen per subtopic
+        rows = self.conn.execute(
+            f"{cte} SELECT subtopic, topic, MIN(row_order) FROM valid GROUP BY subtopic", params
+        ).fetchall()
+        self.subtopic_topics = {subtopic: topic for subtopic, topic, _ in rows}
+        self._match_test_ids()
+
+    def _match_test_ids(self) -> None:
+        """Key the test tallies as analyze() would on the stored rows read back from a CSV.
+
+        Rows stored without a test id report a single "Test 1", and numeric test ids become numbers
+        (floats once any row is blank), so they sort and print as in the type-inferred column.
+        """
+        stored = [row[0] for row in self.conn.execute(
+            f"SELECT DISTINCT test_id FROM questions WHERE {self.filter_column} = ?", [self.value]
+        )]
+        ids = pd.Series([value or None for value in stored], dtype=object)
+        if ids.isna().all():
+            self.test_id_col = None
+            return
+        if not is_numeric_text(ids):
+            return
+        numbers = dict(zip(stored, pd.to_numeric(ids).tolist()))
+        tests = {}
+        # Spellings of one number, such as "1" and "01", are one test in the numeric column
+        for key, values in self.tallies["tests"].items():
+            current = tests.get(numbers[key])
+            tests[numbers[key]] = values if current is None else [a + b for a, b in zip(current, values)]
+        self.tallies["tests"] = tests
@@ -0,0 +1,280 @@
+import pandas as pd
+from typing import Dict, Iterable, Iterator, Optional
+
+from analyzer import PerformanceAnalyzer
+from ingest import CorrectCells, file_compression, file_format, iter_columnar_batches, read_header, resolve_schema
+
+
+class StreamingAnalyzer:
+    """Folds CSV chunks into mergeable tallies so large exports are analyzed with bounded memory.
+
+    Every metric in PerformanceAnalyzer.analyze is a ratio of counts and sums, so each chunk is
+    cleaned on its own, reduced to per-key tallies and added to the running totals. Memory is
+    bounded by the chunk size plus one row per subtopic, topic and test.
+    """
+
+    DEFAULT_CHUNKSIZE = 100_000
+
+    # Raw columns read alongside the analyzed ones, for subclasses that check more than the analysis
+    KEEP_COLUMNS = ()
+
+    # Additive fields kept per key for each tally; "overall" has the single key "all"
+    TALLY_FIELDS = {
+        "overall": ["attempts", "correct", "time_sum", "time_correct_sum", "time_incorrect_sum"],
+        "difficulties": ["attempts", "correct"],
+        "subtopics": ["attempts", "correct", "time_sum", "time_incorrect_sum", "difficulty_sum", "high"],
+        "topics": ["attempts", "correct", "difficulty_sum", "high"],
+        "tests": ["attempts", "correct", "time_sum", "hard_attempts", "hard_correct"],
+    }
+
+    def __init__(self):
+        # Running totals as {key: [field sums]} so merging a chunk touches only the keys it contains
+        self.tallies = {name: {} for name in self.TALLY_FIELDS}
+        self.subtopic_topics = {}
+        self.test_id_col = None
+        self.correct_cells = CorrectCells()
+        self.cleaning_report = {"input_rows": 0, "valid_rows": 0, "rejected": {}}
+        self.analysis_results = {}
+
+    @classmethod
+    def from_csv(cls, source, chunksize: int = DEFAULT_CHUNKSIZE, **read_csv_kwargs) -> "StreamingAnalyzer":
+        """Analyze a CSV path or seekable file object chunk by chunk"""
+        analyzer = cls()
+        analyzer.consume_csv(source, chunksize, **read_csv_kwargs)
+        return analyzer
+
+    @classmethod
+    def from_file(cls, source, filename: str, chunksize: int = DEFAULT_CHUNKSIZE) -> "StreamingAnalyzer":
+        """Analyze a CSV (optionally .gz/.zst), Parquet or Arrow upload chunk by chunk, by file name"""
+        analyzer = cls()
+        analyzer.consume_file(source, filename, chunksize)
+        return analyzer
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[pd.DataFrame]) -> "StreamingAnalyzer":
+        analyzer = cls()
+        for chunk in chunks:
+            analyzer.consume(chunk)
+        return analyzer
+
+    @classmethod
+    def read_chunks(cls, source, chunksize: int = DEFAULT_CHUNKSIZE, **read_csv_kwargs) -> Iterator[pd.DataFrame]:
+        """Iterate over a CSV path or seekable file object in chunks of raw attempts"""
+        # Explicit text dtypes also keep every chunk's correctness and difficulty parsed the same way
+        usecols, dtypes = resolve_schema(read_header(source, **read_csv_kwargs), keep=cls.KEEP_COLUMNS)
+        return pd.read_csv(source, chunksize=chunksize, usecols=usecols, dtype=dtypes, **read_csv_kwargs)
+
+    def consume_csv(self, source, chunksize: int = DEFAULT_CHUNKSIZE, **read_csv_kwargs) -> None:
+        for chunk in self.read_chunks(source, chunksize, **read_csv_kwargs):
+            self.consume(chunk)
+
+    def consume_file(self, source, filename: str, chunksize: int = DEFAULT_CHUNKSIZE) -> None:
+        fmt = file_format(filename)
+        if fmt == "csv":
+            # Compressed CSVs are decompressed on the fly as chunks are read
+            self.consume_csv(source, chunksize, compression=file_compression(filename))
+            return
+        for chunk in iter_columnar_batches(source, fmt, keep=self.KEEP_COLUMNS, batch_size=chunksize):
+            self.consume(chunk)
+
+    def consume(self, chunk: pd.DataFrame) -> None:
+        """Clean one chunk of raw attempts and fold it into the running tallies"""
+        cleaner = PerformanceAnalyzer(chunk)
+        cleaner._normalize_columns()
+        self.correct_cells.note(cleaner.df["correct"])
+        cleaner._validate_and_clean_data(allow_empty=True)
+        self._merge_report(cleaner.cleaning_report)
+        test_id_col = cleaner._test_id_column() or ""
+        if self.test_id_col is None:
+            self.test_id_col = test_id_col
+        elif test_id_col != self.test_id_col:
+            raise ValueError("New attempts must use the same test id column as the earlier attempts")
+        if not cleaner.df.empty:
+            self.add_clean(cleaner.df)
+
+    def add_clean(self, df: pd.DataFrame) -> None:
+        """Fold already-cleaned attempts (canonical column names) into the running tallies"""
+        tallies = self.tally(df, self.test_id_col)
+        for name, table in tallies.items():
+            if name in self.tallies:
+                self._merge(self.tallies[name], table)
+        # The first topic seen for a subtopic wins, as with groupby "first" over the whole file
+        first_topics = tallies["subtopic_topics"]
+        for subtopic, topic in zip(first_topics.index.tolist(), first_topics.tolist()):
+            self.subtopic_topics.setdefault(subtopic, topic)
+
+    @staticmethod
+    def tally(df: pd.DataFrame, test_id_col: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+        """Reduce cleaned attempts to additive counts and sums keyed by difficulty, subtopic, topic and test"""
+        correct = df["correct"]
+        is_hard = df["difficulty"] == 3
+        frame = df.assign(
+            time_correct=df["time_seconds"].where(correct, 0.0),
+            time_incorrect=df["time_seconds"].where(~correct, 0.0),
+            is_high=df["topic_weightage"] == "high",
+            is_hard=is_hard,
+            hard_correct=is_hard & correct,
+        )
+
+        tallies = {
+            "overall": pd.DataFrame({
+                "attempts": [len(frame)],
+                "correct": [int(correct.sum())],
+                "time_sum": [frame["time_seconds"].sum()],
+                "time_correct_sum": [frame["time_correct"].sum()],
+                "time_incorrect_sum": [frame["time_incorrect"].sum()],
+            }, index=["all"]),
+            "difficulties": frame.groupby("difficulty", observed=True).agg(
+                attempts=("correct", "size"),
+                correct=("correct", "sum"),
+            ),
+            "subtopics": frame.groupby("subtopic", observed=True).agg(
+                attempts=("correct", "size"),
+                correct=("correct", "sum"),
+                time_sum=("time_seconds", "sum"),
+                time_incorrect_sum=("time_incorrect", "sum"),
+                difficulty_sum=("difficulty", "sum"),
+                high=("is_high", "sum"),
+            ),
+            "subtopic_topics": frame.groupby("subtopic", observed=True)["topic"].first(),
+            "topics": frame.groupby("topic", observed=True).agg(
+                attempts=("correct", "size"),
+                correct=("correct", "sum"),
+                difficulty_sum=("difficulty", "sum"),
+                high=("is_high", "sum"),
+            ),
+        }
+        if test_id_col:
+            tallies["tests"] = frame.groupby(test_id_col, observed=True).agg(
+                attempts=("correct", "size"),
+                correct=("correct", "sum"),
+                time_sum=("time_seconds", "sum"),
+                hard_attempts=("is_hard", "sum"),
+                hard_correct=("hard_correct", "sum"),
+            )
+        return tallies
+
+    def result(self) -> Dict:
+        """Final analysis in the same shape as PerformanceAnalyzer.analyze"""
+        if not self.tallies["overall"]:
+            raise ValueError("No valid attempts after cleaning. Check your CSV values.")
+        if self.correct_cells.all_incorrect:
+            self._score_all_incorrect()
+
+        overall = dict(zip(self.TALLY_FIELDS["overall"], self.tallies["overall"]["all"]))
+        attempts = int(overall["attempts"])
+        correct = overall["correct"]
+        incorrect = attempts - correct
+        overall_accuracy = float(correct / attempts)
+        avg_time_correct = float(overall["time_correct_sum"] / correct) if correct else 0.0
+        avg_time_incorrect = float(overall["time_incorrect_sum"] / incorrect) if incorrect else 0.0
+        avg_time = float(overall["time_sum"] / attempts)
+
+        accuracy_by_difficulty = []
+        for diff in [1, 2, 3]:
+            level_attempts, level_correct = self.tallies["difficulties"].get(diff, [0, 0])
+            accuracy_by_difficulty.append({
+                "difficulty": diff,
+                "accuracy": round(float(level_correct / level_attempts) * 100, 2) if level_attempts else 0.0,
+                "attempts": int(level_attempts),
+            })
+        hard_accuracy = accuracy_by_difficulty[2]["accuracy"] / 100
+        strength_score = float(PerformanceAnalyzer._strength_formula(overall_accuracy, hard_accuracy, avg_time))
+
+        # Reuse PerformanceAnalyzer's record builders so rankings are formatted and sorted identically
+        subtopic_ranking = PerformanceAnalyzer._subtopic_records(self._subtopic_frame())
+        PerformanceAnalyzer._sort_subtopic_ranking(subtopic_ranking)
+
+        topics = self._table("topics", "topic")
+        prioritized_topics = PerformanceAnalyzer._topic_records(pd.DataFrame({
+            "mistakes": (topics["attempts"] - topics["correct"]).astype(int),
+            "total": topics["attempts"].astype(int),
+            "avg_difficulty": topics["difficulty_sum"] / topics["attempts"],
+            "has_high_weightage": topics["high"] > 0,
+        }, index=topics.index))
+        PerformanceAnalyzer._sort_prioritized_topics(prioritized_topics)
+
+        if self.test_id_col:
+            tests = self._table("tests", self.test_id_col)
+            per_test = PerformanceAnalyzer._add_strength_scores(pd.DataFrame({
+                "accuracy": tests["correct"] / tests["attempts"],
+                "hard_accuracy": tests["hard_correct"] / tests["hard_attempts"],
+                "avg_time": tests["time_sum"] / tests["attempts"],
+            }, index=tests.index))
+            strength_progression = PerformanceAnalyzer._progression_records(per_test)
+        else:
+            strength_progression = [{"test_id": "Test 1", "strength_score": round(strength_score, 2)}]
+
+        self.analysis_results = {
+            "summary": {
+                "total_attempts": attempts,
+                "overall_accuracy": round(overall_accuracy * 100, 2),
+                "avg_time_correct": round(avg_time_correct, 2),
+                "avg_time_incorrect": round(avg_time_incorrect, 2),
+                "strength_level": PerformanceAnalyzer._strength_level(strength_score),
+            },
+            "accuracy_by_difficulty": accuracy_by_difficulty,
+            "time_comparison": {
+                "avg_time_correct": avg_time_correct,
+                "avg_time_incorrect": avg_time_incorrect,
+            },
+            "strength_progression": strength_progression,
+            "subtopic_ranking": subtopic_ranking,
+            "topics": sorted(topics.index.tolist()),
+            "prioritized_topics": prioritized_topics,
+            "data_quality": self.cleaning_report,
+        }
+        return self.analysis_results
+
+    def _score_all_incorrect(self) -> None:
+        """Match analyze() on the whole file when its correctness column was numbers with a blank
+        (see ingest.CorrectCells); chunks read as text can only tell at the end"""
+        fields = {name: self.TALLY_FIELDS[name] for name in self.tallies}
+        for name, totals in self.tallies.items():
+            for values in totals.values():
+                row = dict(zip(fields[name], values))
+                row["correct"] = 0
+                if "hard_correct" in row:
+                    row["hard_correct"] = 0
+                if "time_incorrect_sum" in row:
+                    row["time_incorrect_sum"] = row["time_sum"]
+                if "time_correct_sum" in row:
+                    row["time_correct_sum"] = 0.0
+                values[:] = [row[field] for field in fields[name]]
+
+    def _subtopic_frame(self) -> pd.DataFrame:
+        """Subtopic tallies converted to the columns PerformanceAnalyzer._subtopic_records expects"""
+        subtopics = self._table("subtopics", "subtopic")
+        mistakes = subtopics["attempts"] - subtopics["correct"]
+        return pd.DataFrame({
+            "topic": [self.subtopic_topics[subtopic] for subtopic in subtopics.index],
+            "attempts": subtopics["attempts"].astype(int),
+            "accuracy": subtopics["correct"] / subtopics["attempts"],
+            "mistakes": mistakes.astype(int),
+            "avg_time": subtopics["time_sum"] / subtopics["attempts"],
+            "avg_time_incorrect": subtopics["time_incorrect_sum"] / mistakes,
+            "avg_difficulty": subtopics["difficulty_sum"] / subtopics["attempts"],
+            "has_high_weightage": subtopics["high"] > 0,
+        }, index=subtopics.index)
+
+    def _merge_report(self, report: Dict) -> None:
+        self.cleaning_report["input_rows"] += report["input_rows"]
+        self.cleaning_report["valid_rows"] += report["valid_rows"]
+        for name, count in report["rejected"].items():
+            self.cleaning_report["rejected"][name] = self.cleaning_report["rejected"].get(name, 0) + count
+
+    def _table(self, name: str, index_name: str) -> pd.DataFrame:
+        """Running totals for one tally as a DataFrame sorted by key, like a groupby result"""
+        totals = self.tallies[name]
+        return pd.DataFrame(
+            list(totals.values()),
+            index=pd.Index(list(totals.keys()), name=index_name),
+            columns=self.TALLY_FIELDS[name],
+        ).sort_index()
+
+    @staticmethod
+    def _merge(totals: Dict, table: pd.DataFrame) -> None:
+        """Add a chunk's tally into the running totals, touching only the keys present in the chunk"""
+        for key, values in zip(table.index.tolist(), table.to_numpy().tolist()):
+            current = totals.get(key)
+            totals[key] = values if current is None else [a + b for a, b in zip(current, values)]
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""Check the aggregates the loader keeps current match a rebuild from the questions table"""
+
+import io
+
+import pandas as pd
+
+import aggregates
+from analyzer import PerformanceAnalyzer
+from benchmark import make_attempts
+from loader import BulkLoader
+
+
+def attempts(rows: int, seed: int) -> pd.DataFrame:
+    df = make_attempts(rows, students=6, tests=3, subtopics=20, seed=seed)
+    df["question_id"] = df["question_id"].str[-3:]  # overlapping keys, so later files replace rows
+    df = df.drop_duplicates(["student_id", "test_id", "question_id"])
+    # Subtopics filed under two topics, so replaced rows can move a subtopic's first-seen topic
+    df.loc[df.index[seed::5], "topic"] = "Revision"
+    df.loc[df.index[::31], "time_taken"] = -1
+    df.loc[df.index[2::37], "topic"] = None
+    return df
+
+
+def csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
+
+
+def aggregate_rows(conn) -> dict:
+    tables = list(aggregates.AGGREGATE_TABLES) + ["student_rejections"]
+    return {table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall()) for table in tables}
+
+
+def test_incremental_aggregates_match_a_rebuild(tmp_path):
+    files = [attempts(900, seed) for seed in (1, 2, 3)]
+    with BulkLoader(str(tmp_path / "attempts.db"), batch_size=128) as loader:
+        for df in files:
+            loader.load_stream(io.BytesIO(csv_bytes(df)))
+        # Loading the first file again puts its rows back over those the later files replaced
+        loader.load_stream(io.BytesIO(csv_bytes(files[0])))
+
+        assert aggregates.check(loader.conn) == []
+        incremental = aggregate_rows(loader.conn)
+        aggregates.rebuild(loader.conn)
+        assert aggregate_rows(loader.conn) == incremental
+
+
+def test_stored_student_matches_analyze_of_final_rows(tmp_path):
+    first, second = attempts(900, 4), attempts(900, 5)
+    with BulkLoader(str(tmp_path / "attempts.db"), batch_size=100) as loader:
+        loader.load_stream(io.BytesIO(csv_bytes(first)))
+        loader.load_stream(io.BytesIO(csv_bytes(second)))
+
+        # The second file replaces the first's rows with the same key; the rest stay in load order
+        key = ["student_id", "test_id", "question_id"]
+        kept = first.merge(second[key], on=key, how="left", indicator=True)
+        final = pd.concat([kept[kept["_merge"] == "left_only"].drop(columns="_merge"), second])
+        # Replaced rows keep their place, so reorder by first appearance like the stored rowids
+        order = pd.concat([first[key], second[key]]).drop_duplicates().reset_index(drop=True)
+        final = order.merge(final, on=key, how="left")
+
+        for student_id in ["S00000", "S00003"]:
+            rows = final[final["student_id"] == student_id].drop(columns="student_id")
+            expected = PerformanceAnalyzer(pd.read_csv(io.BytesIO(csv_bytes(rows)))).analyze()
+            assert aggregates.MaterializedAnalyzer.for_student(loader.conn, student_id).result() == expected
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""Check batch uploads analyze each file as a single upload would, including zip archives"""
+
+import io
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+import app as app_module
+from analyzer import PerformanceAnalyzer
+from batch import BatchAnalyzer, extract_zip
+
+STRONG_CSV = b"""test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+T1,Q1,Physics,Kinematics,easy,1,10
+T1,Q2,Physics,Optics,hard,1,40
+T2,Q3,Maths,Algebra,medium,1,25
+"""
+
+WEAK_CSV = b"""test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+T1,Q1,Physics,Kinematics,easy,0,10
+T1,Q2,Physics,Optics,hard,0,40
+T2,Q3,Maths,Algebra,medium,1,25
+"""
+
+
+def zipped(members: dict) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zip_and_loose_files_analyze_like_single_uploads(client, monkeypatch, workers):
+    monkeypatch.setitem(app_module.app.config, "BATCH_WORKERS", workers)
+    archive = zipped({
+        "term1/strong.csv": STRONG_CSV,
+        "../escape/weak.csv": WEAK_CSV,
+        "notes.txt": b"skipped: not an attempts file",
+        "__MACOSX/term1/._strong.csv": b"resource fork",
+        "broken.csv": b"question_id,topic\nQ1,Physics\n",
+    })
+    response = client.post("/api/batch/upload", data={"files": [
+        (archive, "terms.zip"), (io.BytesIO(WEAK_CSV), "loose.csv"),
+    ]})
+    assert response.status_code == 200
+    body = response.get_json()
+
+    files = {result["filename"]: result for result in body["files"]}
+    assert list(files) == ["term1/strong.csv", "../escape/weak.csv", "broken.csv", "loose.csv"]
+    assert files["broken.csv"]["success"] is False
+    for name, csv in [("term1/strong.csv", STRONG_CSV), ("loose.csv", WEAK_CSV)]:
+        single = client.post("/api/upload", data={"file": (io.BytesIO(csv), "attempts.csv")}).get_json()
+        assert files[name]["analysis"] == single["analysis"]
+        assert files[name]["plan"] == single["plan"]
+
+    comparison = body["comparison"]
+    assert (comparison["files"], comparison["failed"]) == (3, 1)
+    assert [item["filename"] for item in comparison["ranking"]] == ["../escape/weak.csv", "loose.csv", "term1/strong.csv"]
+
+
+def test_archive_members_are_written_inside_the_directory(tmp_path):
+    archive = zipped({"../../outside.csv": STRONG_CSV, "/absolute.csv": WEAK_CSV})
+    files = extract_zip(archive, str(tmp_path), max_bytes=1024)
+    assert [name for _, name in files] == ["../../outside.csv", "/absolute.csv"]
+    assert all(os.path.dirname(path) == str(tmp_path) for path, _ in files)
+
+
+def test_archive_expanding_past_the_limit_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="expands past"):
+        extract_zip(zipped({"big.csv": STRONG_CSV * 100}), str(tmp_path), max_bytes=len(STRONG_CSV))
+
+
+def test_workers_are_capped_by_the_file_count():
+    assert BatchAnalyzer(8).workers_for(3) == 3
+    assert BatchAnalyzer(2).workers_for(5) == 2
+    assert BatchAnalyzer(4).workers_for(0) == 1
+
+
+def test_batch_results_keep_the_file_order(tmp_path):
+    paths = []
+    for name, csv in [("weak.csv", WEAK_CSV), ("strong.csv", STRONG_CSV)]:
+        (tmp_path / name).write_bytes(csv)
+        paths.append((str(tmp_path / name), name))
+    results = BatchAnalyzer(2).analyze_files(paths)
+    assert [result["filename"] for result in results] == ["weak.csv", "strong.csv"]
+    assert results[1]["analysis"] == PerformanceAnalyzer(pd.read_csv(io.BytesIO(STRONG_CSV))).analyze()
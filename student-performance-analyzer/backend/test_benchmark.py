@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+"""Check every benchmark entry point runs end to end on a small synthetic export"""
+
+import pytest
+
+import benchmark
+
+
+@pytest.mark.parametrize("name", sorted(benchmark.BENCHMARKS))
+def test_benchmark_runs(name, capsys):
+    benchmark.BENCHMARKS[name](300)
+    assert capsys.readouterr().out
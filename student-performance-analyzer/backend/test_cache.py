@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""Check ResultCache eviction and SingleFlight coalescing"""
+
+import threading
+import time
+
+import cache
+from cache import ResultCache, SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_least_recently_used_entry_is_evicted():
+    results = ResultCache(max_entries=2)
+    results.put("a", b"1")
+    results.put("b", b"2")
+    assert results.get("a") == b"1"  # b is now the least recently used
+
+    results.put("c", b"3")
+    assert results.get("b") is None
+    assert results.get("a") == b"1"
+    assert results.get("c") == b"3"
+    assert results.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    results = ResultCache(ttl_seconds=60)
+    results.put("a", b"body")
+
+    clock.now += 59
+    assert results.get("a") == b"body"
+    clock.now += 1
+    assert results.get("a") is None
+
+    stats = results.stats()
+    assert (stats["entries"], stats["bytes"], stats["hits"], stats["misses"]) == (0, 0, 1, 1)
+
+
+def test_byte_budget_evicts_oldest_and_skips_oversized_bodies():
+    results = ResultCache(max_entries=10, max_bytes=10)
+    results.put("a", b"aaaa")
+    results.put("b", b"bbbb")
+    results.put("c", b"cccc")  # 12 bytes: a goes
+
+    assert results.get("a") is None
+    assert results.stats()["bytes"] == 8
+
+    results.put("big", b"x" * 11)  # larger than the whole budget: not cached, nothing evicted
+    assert results.get("big") is None
+    assert results.get("b") == b"bbbb"
+    assert results.get("c") == b"cccc"
+
+    results.put("b", b"bb")  # replacing an entry releases its old bytes
+    assert results.stats()["bytes"] == 6
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def run_in_thread(fn):
+    """Start fn on a thread; returns a list that receives ('ok', value) or ('error', exception)"""
+    outcome = []
+
+    def target():
+        try:
+            outcome.append(("ok", fn()))
+        except Exception as e:
+            outcome.append(("error", e))
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def test_follower_shares_the_leaders_result():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "body"
+
+    leader, led = run_in_thread(lambda: flights.do("key", compute))
+    wait_until(lambda: flights.stats()["in_flight"] == 1)
+    follower, followed = run_in_thread(lambda: flights.do("key", compute))
+    wait_until(lambda: flights.stats()["coalesced"] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert led == [("ok", ("body", False))]
+    assert followed == [("ok", ("body", True))]
+    assert len(calls) == 1
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 1}
+
+
+def test_abandoned_flight_makes_waiters_compute():
+    flights = SingleFlight()
+    flight, is_leader = flights.join("key")
+    assert is_leader
+
+    follower, followed = run_in_thread(lambda: flights.do("key", lambda: "recomputed"))
+    wait_until(lambda: flights.stats()["coalesced"] == 1)
+    # The leader gives up (e.g. its client disconnected) without a result or an error
+    flights.finish("key", flight)
+    follower.join(5)
+
+    assert followed == [("ok", ("recomputed", False))]
+    assert flights.stats() == {"in_flight": 0, "leaders": 2, "coalesced": 1}
+
+
+def test_leader_error_releases_followers():
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("bad upload")
+
+    leader, led = run_in_thread(lambda: flights.do("key", fail))
+    wait_until(lambda: flights.stats()["in_flight"] == 1)
+    follower, followed = run_in_thread(lambda: flights.do("key", lambda: "unused"))
+    wait_until(lambda: flights.stats()["coalesced"] == 1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert [kind for kind, _ in led + followed] == ["error", "error"]
+    assert led[0][1] is followed[0][1]
+    assert flights.stats()["in_flight"] == 0
+    # The failure isn't remembered: the next caller computes afresh
+    assert flights.do("key", lambda: "retried") == ("retried", False)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""Check CohortAnalyzer gives each student the analysis PerformanceAnalyzer gives their rows alone"""
+
+import pandas as pd
+import pytest
+
+from analyzer import PerformanceAnalyzer
+from benchmark import make_attempts
+from cohort import CohortAnalyzer
+
+
+def cohort_attempts() -> pd.DataFrame:
+    df = make_attempts(3000, students=12, tests=4, subtopics=30)
+    # Rows every cleaning check rejects, and a student whose rows are all rejected
+    df.loc[df.index[:40], "time_taken"] = -5
+    df.loc[df.index[40:60], "difficulty_level"] = "impossible"
+    df.loc[df.index[60:80], "topic"] = None
+    df.loc[df["student_id"] == "S00011", "subtopic"] = None
+    return df
+
+
+def per_student(df: pd.DataFrame, student_id: str) -> dict:
+    analysis = PerformanceAnalyzer(df[df["student_id"] == student_id].drop(columns="student_id")).analyze()
+    del analysis["data_quality"]
+    return {"student_id": student_id, **analysis}
+
+
+def test_each_student_matches_a_single_student_analysis():
+    df = cohort_attempts()
+    analysis = CohortAnalyzer(df.copy()).analyze()
+
+    students = [result["student_id"] for result in analysis["students"]]
+    assert students == sorted(set(df["student_id"]) - {"S00011"})
+    for result in analysis["students"]:
+        assert result == per_student(df, result["student_id"])
+
+
+def test_cohort_summary_and_cleaning_report_cover_every_row():
+    df = cohort_attempts()
+    analysis = CohortAnalyzer(df.copy()).analyze()
+    whole = PerformanceAnalyzer(df.drop(columns="student_id")).analyze()
+
+    summary = analysis["cohort_summary"]
+    assert summary["total_students"] == 11
+    assert summary["total_attempts"] == whole["summary"]["total_attempts"]
+    assert summary["overall_accuracy"] == whole["summary"]["overall_accuracy"]
+    assert sum(summary["strength_levels"].values()) == 11
+    # The cohort also requires a student id, which every row here has
+    expected = whole["data_quality"]
+    expected["rejected"]["missing_student_id"] = 0
+    assert analysis["data_quality"] == expected
+
+
+def test_missing_student_column_is_rejected():
+    with pytest.raises(ValueError, match="student_id"):
+        CohortAnalyzer(make_attempts(10).drop(columns="student_id")).analyze()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""Check /api/health answers liveness and /api/ready follows warm_up"""
+
+import pytest
+
+import app as app_module
+
+
+@pytest.fixture
+def warmup(client, monkeypatch):
+    """A fresh warmup_state, with the process pool and GenAI steps kept cheap"""
+    monkeypatch.setattr(app_module, "warmup_state", {"ready": False, "steps": {}})
+    monkeypatch.setitem(app_module.app.config, "BATCH_WORKERS", 1)
+    monkeypatch.setitem(app_module.app.config, "COHORT_WORKERS", 1)
+    monkeypatch.setenv("USE_GENAI", "false")
+    return client
+
+
+def fail(message):
+    def step(*args, **kwargs):
+        raise RuntimeError(message)
+    return step
+
+
+def test_not_ready_before_warm_up_but_alive(warmup):
+    assert warmup.get("/api/ready").status_code == 503
+    assert warmup.get("/api/health").status_code == 200
+
+
+def test_ready_after_warm_up(warmup):
+    assert app_module.warm_up()
+
+    response = warmup.get("/api/ready")
+    assert response.status_code == 200
+    steps = response.get_json()["steps"]
+    assert all(step["ok"] for step in steps.values()), steps
+    assert steps["process_pools"]["detail"].startswith("skipped")
+
+
+def test_failed_required_step_keeps_app_unready(warmup, monkeypatch):
+    monkeypatch.setattr(app_module, "init_db", fail("disk full"))
+    assert not app_module.warm_up()
+
+    response = warmup.get("/api/ready")
+    assert response.status_code == 503
+    database = response.get_json()["steps"]["database"]
+    assert (database["ok"], database["error"]) == (False, "disk full")
+    # Liveness doesn't depend on warm_up: restarting the process wouldn't fix a full disk
+    assert warmup.get("/api/health").status_code == 200
+
+
+def test_failed_optional_step_is_reported_without_blocking(warmup, monkeypatch):
+    monkeypatch.setattr(app_module, "load_sample_data", fail("sample file missing"))
+    assert app_module.warm_up()
+
+    response = warmup.get("/api/ready")
+    assert response.status_code == 200
+    assert response.get_json()["steps"]["sample_data"]["error"] == "sample file missing"
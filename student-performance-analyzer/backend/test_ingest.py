@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Check reading correctness as text scores it exactly as the type-inferred pd.read_csv did"""
+
+import io
+
+import pandas as pd
+import pytest
+
+from analyzer import PerformanceAnalyzer
+from ingest import read_attempts, read_attempts_csv
+from streaming import StreamingAnalyzer
+
+# The blank is_correct cell makes pd.read_csv infer a float column, scoring every 1.0 incorrect
+BLANK_CORRECT_CSV = b"""question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+Q1,Physics,Kinematics,easy,1,10
+Q2,Physics,Kinematics,medium,0,20
+Q3,Physics,Optics,hard,,30
+Q4,Physics,Optics,easy,1,40
+"""
+
+
+@pytest.mark.parametrize("engine", ["c", "python"])
+def test_blank_correct_cell_scores_as_inferred_read(engine):
+    baseline = PerformanceAnalyzer(pd.read_csv(io.BytesIO(BLANK_CORRECT_CSV))).analyze()
+    assert baseline["summary"]["overall_accuracy"] == 0.0
+
+    analysis = PerformanceAnalyzer(read_attempts_csv(io.BytesIO(BLANK_CORRECT_CSV), engine=engine)).analyze()
+    assert analysis == baseline
+    assert PerformanceAnalyzer(read_attempts(io.BytesIO(BLANK_CORRECT_CSV), "attempts.csv")).analyze() == baseline
+
+    streamed = StreamingAnalyzer()
+    streamed.consume_file(io.BytesIO(BLANK_CORRECT_CSV), "attempts.csv", chunksize=2)
+    assert streamed.result() == baseline
+
+
+def test_numeric_correct_column_without_blanks_keeps_ones_correct():
+    csv = BLANK_CORRECT_CSV.replace(b"hard,,30", b"hard,1,30")
+    baseline = PerformanceAnalyzer(pd.read_csv(io.BytesIO(csv))).analyze()
+    assert baseline["summary"]["overall_accuracy"] == 75.0
+    assert PerformanceAnalyzer(read_attempts(io.BytesIO(csv), "attempts.csv")).analyze() == baseline
+    # The first chunk has no blank, but the blank in the second decides for the whole column
+    streamed = StreamingAnalyzer()
+    streamed.consume_file(io.BytesIO(BLANK_CORRECT_CSV), "attempts.csv", chunksize=2)
+    assert streamed.result()["summary"]["overall_accuracy"] == 0.0
+
+
+@pytest.mark.parametrize("engine", ["c", "python", "pyarrow"])
+def test_blank_numeric_cells_read_as_inferred_floats(engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    # Blank test id and time cells make both integer columns float, as "1.0" and 10.0
+    csv = b"""test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+1,Q1,Physics,Kinematics,easy,yes,10
+2,Q2,Physics,Optics,hard,no,
+,Q3,Maths,Algebra,medium,yes,30
+"""
+    baseline = PerformanceAnalyzer(pd.read_csv(io.BytesIO(csv))).analyze()
+    assert [entry["test_id"] for entry in baseline["strength_progression"]] == ["1.0"]
+    assert PerformanceAnalyzer(read_attempts_csv(io.BytesIO(csv), engine=engine)).analyze() == baseline
+
+
+def test_columnar_correct_column_parses_as_csv(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    expected = PerformanceAnalyzer(read_attempts(io.BytesIO(BLANK_CORRECT_CSV), "attempts.csv")).analyze()
+
+    # A nullable correctness column is stored as float (1.0, 0.0, null), as pandas would write it
+    table = pa.table({
+        "question_id": ["Q1", "Q2", "Q3", "Q4"],
+        "topic": ["Physics"] * 4,
+        "subtopic": ["Kinematics", "Kinematics", "Optics", "Optics"],
+        "difficulty_level": ["easy", "medium", "hard", "easy"],
+        "is_correct": pa.array([1.0, 0.0, None, 1.0]),
+        "time_taken": [10, 20, 30, 40],
+    })
+    path = str(tmp_path / "attempts.parquet")
+    pq.write_table(table, path)
+
+    assert PerformanceAnalyzer(read_attempts(path, "attempts.parquet")).analyze() == expected
+    streamed = StreamingAnalyzer()
+    streamed.consume_file(path, "attempts.parquet", chunksize=2)
+    assert streamed.result() == expected
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""Check the job queue lifecycle and the upload job's polling and SSE endpoints"""
+
+import io
+import json
+import threading
+
+import pytest
+
+import app as app_module
+from jobs import JobQueue, QueueFull
+
+UPLOAD_CSV = b"""test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken,topic_weightage
+T1,Q1,Physics,Kinematics,easy,1,10,high
+T1,Q2,Physics,Optics,hard,0,40,low
+T2,Q3,Maths,Algebra,medium,1,25,high
+T2,Q4,Maths,Algebra,hard,0,60,low
+"""
+
+
+def wait_for(queue: JobQueue, job, status: str) -> None:
+    version = None
+    while job.status != status:
+        assert version != job.version or queue.wait(job, version, timeout=5), f"job stuck in {job.status}"
+        version = job.version
+
+
+def test_job_runs_through_its_states_and_stages():
+    queue = JobQueue(workers=1)
+    release = threading.Event()
+
+    def work(job, value):
+        job.report("first", {"value": value})
+        release.wait(5)
+        return {"doubled": value * 2}, 200
+
+    job = queue.submit("test", work, 21)
+    wait_for(queue, job, "running")
+    assert job.to_dict()["stages"] == ["first"]
+    assert "result" not in job.to_dict()
+    release.set()
+    wait_for(queue, job, "succeeded")
+
+    assert job.to_dict()["result"] == {"doubled": 42}
+    assert job.status_code == 200
+    stats = queue.stats()
+    assert (stats["submitted"], stats["failed"], stats["queued"], stats["running"]) == (1, 0, 0, 0)
+    queue.shutdown()
+
+
+def test_failures_use_on_error_and_a_full_queue_rejects():
+    queue = JobQueue(workers=1, max_pending=1)
+    release = threading.Event()
+
+    def fail(job):
+        release.wait(5)
+        raise ValueError("bad upload")
+
+    job = queue.submit("test", fail, on_error=lambda e: ({"error": str(e)}, 400))
+    with pytest.raises(QueueFull):
+        queue.submit("test", fail)
+    release.set()
+    wait_for(queue, job, "failed")
+
+    assert (job.payload, job.status_code) == ({"error": "bad upload"}, 400)
+    assert (queue.stats()["rejected"], queue.stats()["failed"]) == (1, 1)
+    queue.shutdown()
+
+
+def test_identical_keys_share_an_unfinished_job():
+    queue = JobQueue(workers=1)
+    release = threading.Event()
+    work = lambda job: (release.wait(5), 200)
+
+    first, created = queue.submit_or_join("key", "test", work)
+    second, joined_created = queue.submit_or_join("key", "test", work)
+    assert (created, joined_created) == (True, False)
+    assert second is first
+    release.set()
+    wait_for(queue, first, "succeeded")
+
+    # Once finished, the key no longer matches: new work gets a new job
+    third, created = queue.submit_or_join("key", "test", work)
+    assert created and third is not first
+    wait_for(queue, third, "succeeded")
+    assert queue.stats()["coalesced"] == 1
+    queue.shutdown()
+
+
+def sse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_async_upload_streams_stages_then_result(client):
+    accepted = client.post("/api/upload?async=true", data={"file": (io.BytesIO(UPLOAD_CSV), "attempts.csv")})
+    assert accepted.status_code == 202
+    body = accepted.get_json()
+    assert body["coalesced"] is False
+
+    events = sse_events(client.get(body["events_url"]).get_data(as_text=True))
+    names = [name for name, _ in events]
+    assert [name for name in names if name in app_module.UPLOAD_STAGES] == ["analysis", "plan", "genai"]
+    assert names[-1] == "succeeded"
+    result = events[-1][1]["result"]
+
+    # Each stage carries its own keys of the final response
+    for name, data in events:
+        if name in app_module.UPLOAD_STAGES:
+            assert set(data) == set(app_module.UPLOAD_STAGES[name])
+
+    polled = client.get(body["status_url"]).get_json()
+    assert polled["status"] == "succeeded"
+    assert polled["result"] == result
+
+    app_module.result_cache.clear()
+    assert result == client.post("/api/upload", data={"file": (io.BytesIO(UPLOAD_CSV), "attempts.csv")}).get_json()
+
+
+def test_unknown_job_is_not_found(client):
+    assert client.get("/api/jobs/missing").status_code == 404
+    assert client.get("/api/jobs/missing/events").status_code == 404
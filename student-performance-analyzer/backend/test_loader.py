@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""Check attempts stored by BulkLoader analyze the same as the uploaded CSV"""
+
+import io
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+import aggregates
+from analyzer import PerformanceAnalyzer
+from db import ConnectionPool, connect
+from loader import BulkLoader, ensure_schema
+from sql_analysis import SQLAnalyzer
+
+# Aliased headers in mixed case, text booleans, a fractional and a blank time, and a spelled and
+# a numeric difficulty: everything the analyzer accepts that the loader used to store verbatim
+ALIASED_CSV = b"""Student,test,Question,Subject,Chapter,Level,Correct,Time,Weightage
+S1,T1,Q1,Physics,Kinematics,easy,yes,10.5,High
+S1,T1,Q2,Physics,Kinematics,hard,no,20,
+S1,T1,Q3,Maths,Algebra,medium,TRUE,,low
+S1,T2,Q1,Maths,Algebra,2,Correct,30,
+S1,T2,Q2,Maths,Algebra,3,n,-5,high
+"""
+
+
+def test_aliased_upload_round_trips(tmp_path):
+    with BulkLoader(str(tmp_path / "attempts.db")) as loader:
+        assert loader.load_stream(io.BytesIO(ALIASED_CSV), content_hash="aliased", filename="aliased.csv") == 5
+        stored = loader.conn.execute(
+            "SELECT test_id, question_id, is_correct, time_taken FROM questions ORDER BY test_id, question_id"
+        ).fetchall()
+        uploads = loader.conn.execute("SELECT content_hash, rows FROM uploads").fetchall()
+
+    assert stored == [
+        ("T1", "Q1", 1, 10.5), ("T1", "Q2", 0, 20), ("T1", "Q3", 1, None),
+        ("T2", "Q1", 1, 30), ("T2", "Q2", 0, -5),
+    ]
+    assert uploads == [("aliased", 5)]
+
+    expected = PerformanceAnalyzer(pd.read_csv(io.BytesIO(ALIASED_CSV))).analyze()
+    conn = connect(str(tmp_path / "attempts.db"))
+    try:
+        assert SQLAnalyzer.for_student(conn, "S1").result() == expected
+    finally:
+        conn.close()
+
+
+def test_borrowed_connection_is_left_open(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "attempts.db"))
+    with pool.connection() as conn:
+        ensure_schema(conn)
+        aggregates.ensure_schema(conn)
+        with BulkLoader(pool.db_path, conn=conn) as loader:
+            assert loader.load_stream(io.BytesIO(ALIASED_CSV)) == 5
+        assert conn.execute("SELECT COUNT(*) FROM questions").fetchone() == (5,)
+        assert not conn.in_transaction
+        assert aggregates.check(conn) == []
+    pool.close_all()
+
+
+def test_upload_without_rows_is_not_recorded(tmp_path):
+    header_only = ALIASED_CSV.splitlines(keepends=True)[0]
+    with BulkLoader(str(tmp_path / "attempts.db")) as loader:
+        assert loader.load_stream(io.BytesIO(header_only), content_hash="empty", filename="empty.csv") == 0
+        assert loader.load_stream(io.BytesIO(b""), content_hash="blank", filename="blank.csv") == 0
+        assert loader.conn.execute("SELECT COUNT(*) FROM uploads").fetchone() == (0,)
+
+
+def test_replacing_load_keeps_aggregates_current(tmp_path):
+    db_path = str(tmp_path / "attempts.db")
+    # Kinematics is first seen under Physics, so that is its topic label
+    first = b"""student_id,test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+S1,T1,Q1,Physics,Kinematics,easy,1,10
+S1,T1,Q2,Mechanics,Kinematics,hard,0,20
+S1,T1,Q3,Physics,Kinematics,medium,1,30
+"""
+    # Q1 moves to Optics, so the first Kinematics row seen is now the Mechanics one
+    replacement = b"""student_id,test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+S1,T1,Q1,Physics,Optics,easy,0,15
+"""
+    with BulkLoader(db_path) as loader:
+        loader.load_stream(io.BytesIO(first))
+        loader.load_stream(io.BytesIO(replacement))
+        assert aggregates.check(loader.conn) == []
+        stored = aggregates.MaterializedAnalyzer.for_student(loader.conn, "S1")
+        assert stored.subtopic_topics == {"Kinematics": "Mechanics", "Optics": "Physics"}
+
+        # Re-loading the history unchanged keeps every row in place
+        loader.load_stream(io.BytesIO(first))
+        assert aggregates.check(loader.conn) == []
+        assert loader.conn.execute("SELECT question_id FROM questions ORDER BY rowid").fetchall() == [
+            ("Q1",), ("Q2",), ("Q3",)
+        ]
+
+    checked = subprocess.run(
+        [sys.executable, "aggregates.py", "check", "--db", db_path],
+        cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+    )
+    assert checked.returncode == 0, checked.stdout + checked.stderr
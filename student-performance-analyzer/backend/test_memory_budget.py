@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""Check the cleaned analysis frame stays within PerformanceAnalyzer.MAX_BYTES_PER_ROW"""
+
+from analyzer import PerformanceAnalyzer
+from benchmark import make_attempts
+from cohort import CohortAnalyzer
+
+
+def cleaned_bytes_per_row(analyzer_cls, rows: int = 100_000) -> float:
+    raw = make_attempts(rows)
+    analyzer = analyzer_cls(raw)
+    analyzer._normalize_columns()
+    analyzer._validate_and_clean_data()
+    return analyzer.df.memory_usage(deep=True).sum() / len(analyzer.df)
+
+
+def test_memory_per_row_within_budget():
+    for analyzer_cls in (PerformanceAnalyzer, CohortAnalyzer):
+        per_row = cleaned_bytes_per_row(analyzer_cls)
+        assert per_row <= PerformanceAnalyzer.MAX_BYTES_PER_ROW, (
+            f"{analyzer_cls.__name__} uses {per_row:.1f} bytes/row, "
+            f"budget is {PerformanceAnalyzer.MAX_BYTES_PER_ROW}"
+        )
+
+
+if __name__ == "__main__":
+    for analyzer_cls in (PerformanceAnalyzer, CohortAnalyzer):
+        print(f"{analyzer_cls.__name__}: {cleaned_bytes_per_row(analyzer_cls):.1f} bytes/row "
+              f"(budget {PerformanceAnalyzer.MAX_BYTES_PER_ROW})")
+    test_memory_per_row_within_budget()
+    print("[✓] Memory budget respected")
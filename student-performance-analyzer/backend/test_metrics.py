@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Check metrics render in the Prometheus text exposition format"""
+
+import io
+import re
+
+import pytest
+
+import app as app_module
+from metrics import CONTENT_TYPE, Counter, Histogram, Registry
+
+# metric_name{label="value",...} value
+SAMPLE = re.compile(
+    r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)'
+    r'(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\.)*"(?:,|(?=\})))*\})?'
+    r' (?:[-+]?(?:\d+(?:\.\d*)?(?:e[-+]?\d+)?|Inf)|NaN)$'
+)
+
+
+def test_counter_and_collector_render_with_help_and_type():
+    registry = Registry()
+    requests = Counter("requests_total", "Requests served", ["path"], registry=registry)
+    requests.inc(path='/a"b')
+    requests.inc(2, path="/")
+    registry.collector(lambda: [("queue_depth", "gauge", "Jobs waiting", 1.5)])
+
+    assert registry.render() == (
+        "# HELP requests_total Requests served\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{path="/"} 2\n'
+        'requests_total{path="/a\\"b"} 1\n'
+        "# HELP queue_depth Jobs waiting\n"
+        "# TYPE queue_depth gauge\n"
+        "queue_depth 1.5\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    seconds = Histogram("stage_seconds", "Stage time", ["stage"], buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3):
+        seconds.observe(value, stage="parse")
+
+    assert registry.render().splitlines()[2:] == [
+        'stage_seconds_bucket{stage="parse",le="0.1"} 2',
+        'stage_seconds_bucket{stage="parse",le="1"} 3',
+        'stage_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'stage_seconds_sum{stage="parse"} 3.65',
+        'stage_seconds_count{stage="parse"} 4',
+    ]
+
+
+def test_labels_and_names_are_checked():
+    registry = Registry()
+    counter = Counter("events_total", "Events", ["kind"], registry=registry)
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        Counter("events_total", "Events again", registry=registry)
+
+
+def test_endpoint_serves_valid_exposition_text(client):
+    client.post("/api/upload", data={"file": (io.BytesIO(b"""question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+Q1,Physics,Kinematics,easy,1,10
+Q2,Physics,Optics,hard,0,40
+"""), "attempts.csv")})
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == CONTENT_TYPE
+
+    described = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line.startswith("# "):
+            kind, name, rest = line[2:].split(" ", 2)
+            described.setdefault(name, set()).add(kind)
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        family = re.sub(r"_(bucket|sum|count)$", "", match["name"])
+        # Every sample belongs to a family declared above it with both HELP and TYPE
+        assert described.get(family, described.get(match["name"])) == {"HELP", "TYPE"}, line
+
+    text = response.get_data(as_text=True)
+    assert 'upload_stage_seconds_count{stage="analyze"} ' in text
+    assert 'http_request_seconds_count{endpoint="upload_file",method="POST",status="200"} ' in text
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""Check sharding students across processes gives the single-process cohort analysis"""
+
+import pandas as pd
+import pytest
+
+import parallel
+from benchmark import make_attempts
+from cohort import CohortAnalyzer
+from parallel import ShardedCohortAnalyzer
+
+
+def cohort_attempts() -> pd.DataFrame:
+    df = make_attempts(4000, students=40, tests=5, subtopics=60)
+    df.loc[df.index[::50], "time_taken"] = -1
+    df.loc[df.index[3::70], "difficulty_level"] = "unknown"
+    return df
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_sharded_matches_single_pass(workers):
+    df = cohort_attempts()
+    expected = CohortAnalyzer(df.copy()).analyze()
+    assert ShardedCohortAnalyzer(df, workers=workers).analyze() == expected
+
+
+def test_pickled_shards_match_arrow_shards(monkeypatch):
+    df = cohort_attempts()
+    expected = ShardedCohortAnalyzer(df, workers=2).analyze()
+    # Without pyarrow each task is sent its shard's rows instead of a record batch to map
+    monkeypatch.setattr(parallel, "pa", None)
+    assert ShardedCohortAnalyzer(df, workers=2).analyze() == expected
+
+
+def test_shards_arrow_cannot_hold_are_pickled():
+    pytest.importorskip("pyarrow")
+    df = cohort_attempts()
+    # Mixed bools and strings have no Arrow type; the analyzer still reads them as text
+    df["is_correct"] = [True if value else "no" for value in df["is_correct"]]
+    expected = CohortAnalyzer(df.copy()).analyze()
+    assert ShardedCohortAnalyzer(df, workers=2).analyze() == expected
+
+
+def test_every_student_lands_in_one_shard():
+    student_ids = pd.Series([f"S{i}" for i in range(200)] * 3)
+    shards = ShardedCohortAnalyzer.shard_ids(student_ids, 4)
+    assert set(shards.tolist()) == {0, 1, 2, 3}
+    assert pd.Series(shards).groupby(student_ids).nunique().max() == 1
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Check ?progressive=true streams one NDJSON line per pipeline stage, merging to the normal response"""
+
+import io
+import json
+
+import app as app_module
+
+UPLOAD_CSV = b"""test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken,topic_weightage
+T1,Q1,Physics,Kinematics,easy,1,10,high
+T1,Q2,Physics,Optics,hard,0,40,low
+T2,Q3,Maths,Algebra,medium,1,25,high
+T2,Q4,Maths,Algebra,hard,0,60,low
+"""
+
+
+def upload(client, csv: bytes = UPLOAD_CSV, query: str = "?progressive=true"):
+    return client.post(f"/api/upload{query}", data={"file": (io.BytesIO(csv), "attempts.csv")})
+
+
+def stage_lines(response) -> list:
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_stages_arrive_in_order_and_merge_to_the_response(client):
+    response = upload(client)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = stage_lines(response)
+    assert [line["stage"] for line in lines] == ["analysis", "plan", "genai", "done"]
+
+    merged = {"success": True}
+    for line in lines[:-1]:
+        assert set(line["data"]) == set(app_module.UPLOAD_STAGES[line["stage"]])
+        merged.update(line["data"])
+
+    app_module.result_cache.clear()
+    assert merged == upload(client, query="").get_json()
+
+
+def test_cached_upload_replays_the_same_lines(client):
+    first = stage_lines(upload(client))
+    replayed = upload(client)
+    assert replayed.headers["X-Cache"] == "HIT"
+    assert stage_lines(replayed) == first
+
+
+def test_analysis_line_is_sent_before_the_plan_is_built(client, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("planner unavailable")
+
+    monkeypatch.setattr(app_module, "SevenDayPlanner", fail)
+    lines = stage_lines(upload(client))
+    assert [line["stage"] for line in lines] == ["analysis", "error"]
+    assert lines[1]["status"] == 500
+
+
+def test_invalid_file_reports_an_error_line(client):
+    response = upload(client, b"question_id,topic\nQ1,Physics\n")
+    lines = stage_lines(response)
+    assert [line["stage"] for line in lines] == ["error"]
+    # Same status and message as the non-progressive upload answers with
+    assert lines[0]["status"] == 500
+    assert lines[0]["error"] == upload(client, b"question_id,topic\nQ1,Physics\n", "").get_json()["error"]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""Check /api/sample revalidates with its ETag, for both identity and gzip bodies"""
+
+import gzip
+import os
+from pathlib import Path
+
+from cache import FileDerivedResponse
+
+
+def test_unchanged_sample_answers_304(client):
+    first = client.get("/api/sample")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+    etag = first.headers["ETag"]
+
+    revalidated = client.get("/api/sample", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b""
+    assert client.get("/api/sample", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_gzip_body_has_its_own_etag(client):
+    identity = client.get("/api/sample")
+    compressed = client.get("/api/sample", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.get_data()) == identity.get_data()
+
+    etag = compressed.headers["ETag"]
+    assert etag == identity.headers["ETag"][:-1] + '-gzip"'
+    revalidated = client.get("/api/sample", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.get_data() == b""
+    assert "Content-Encoding" not in revalidated.headers
+
+
+def test_body_is_rebuilt_only_when_the_file_content_changes(tmp_path):
+    path = tmp_path / "sample.csv"
+    path.write_bytes(b"a,b\n1,2\n")
+    response = FileDerivedResponse(str(path), lambda source: Path(source).read_bytes().upper())
+
+    body, etag = response.get()
+    assert (body, response.builds) == (b"A,B\n1,2\n", 1)
+    assert response.get() == (body, etag)
+
+    # A new mtime alone costs a hash of the file, not a rebuild
+    os.utime(path, ns=(0, 10 ** 9))
+    assert response.get() == (body, etag)
+    assert response.builds == 1
+
+    path.write_bytes(b"a,b\n3,4\n")
+    body, changed = response.get()
+    assert (body, response.builds) == (b"A,B\n3,4\n", 2)
+    assert changed != etag
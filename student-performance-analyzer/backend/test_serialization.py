@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""Check Accept-Encoding negotiation, response compression and the two JSON encoders"""
+
+import gzip
+import io
+import json
+
+import numpy as np
+import pytest
+from flask import Flask
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+import app as app_module
+from serialization import ENCODINGS, FastJSONProvider, compress, negotiate_encoding
+
+UPLOAD_CSV = b"""test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+T1,Q1,Physics,Kinematics,easy,1,10
+T1,Q2,Physics,Optics,hard,0,40
+T2,Q3,Maths,Algebra,medium,1,25
+"""
+
+
+def accept(header: str) -> Accept:
+    return parse_accept_header(header, Accept)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("*", ENCODINGS[0]),
+    ("br;q=1.0, gzip;q=0.8", ENCODINGS[0]),
+])
+def test_negotiation_honours_client_preferences(header, expected):
+    assert negotiate_encoding(accept(header)) == expected
+
+
+def test_gzip_output_depends_only_on_the_body():
+    body = json.dumps({"values": list(range(1000))}).encode()
+    assert compress(body, "gzip") == compress(body, "gzip")
+    assert gzip.decompress(compress(body, "gzip", gzip_level=1)) == body
+    with pytest.raises(ValueError):
+        compress(body, "deflate")
+
+
+def test_large_json_is_compressed_and_small_json_is_not(client, monkeypatch):
+    upload = {"file": (io.BytesIO(UPLOAD_CSV), "attempts.csv")}
+    identity = client.post("/api/upload", data=upload).get_data()
+    assert len(identity) > app_module.app.config["COMPRESS_MIN_BYTES"]
+
+    app_module.result_cache.clear()
+    upload = {"file": (io.BytesIO(UPLOAD_CSV), "attempts.csv")}
+    compressed = client.post("/api/upload", data=upload, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.get_data()) == identity
+
+    monkeypatch.setitem(app_module.app.config, "COMPRESS_MIN_BYTES", len(identity) + 1)
+    upload = {"file": (io.BytesIO(UPLOAD_CSV), "attempts.csv")}
+    small = client.post("/api/upload", data=upload, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert small.get_data() == identity
+
+
+def test_streamed_stage_lines_are_not_compressed(client):
+    response = client.post(
+        "/api/upload?progressive=true", data={"file": (io.BytesIO(UPLOAD_CSV), "attempts.csv")},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert "Content-Encoding" not in response.headers
+    assert json.loads(response.get_data(as_text=True).splitlines()[-1]) == {"stage": "done"}
+
+
+def test_encoders_agree_on_numpy_values():
+    pytest.importorskip("orjson")
+    app = Flask(__name__)
+    payload = {"b": np.int64(3), "a": [np.float64(0.5), np.bool_(True)], "c": np.arange(3), "d": "naïve"}
+    documents = [json.loads(FastJSONProvider(app, backend).dumps(payload)) for backend in ("stdlib", "orjson")]
+    assert documents[0] == documents[1] == {"a": [0.5, True], "b": 3, "c": [0, 1, 2], "d": "naïve"}
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        FastJSONProvider(Flask(__name__), "yaml")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Check a stored student's analysis matches the analysis of the uploaded CSV"""
+
+import io
+
+import pytest
+
+import app as app_module
+from loader import BulkLoader
+
+# Numeric test ids that sort differently as text, and missing-value spellings pandas reads as NaN
+NUMERIC_TESTS_CSV = b"""student_id,test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+S1,10,Q1,Physics,Kinematics,easy,1,10
+S1,2,Q1,Physics,Optics,hard,0,20
+S1,1,Q1,NA,Optics,medium,1,30
+S1,1,Q2,Maths,null,easy,1,40
+S1,2,Q2,Maths,Algebra,hard,1,15
+S1,10,Q2,Maths,Algebra,medium,0,25
+S1,1,Q3,Maths,Algebra,easy,0,35
+"""
+
+# A blank test id makes the column float, so tests are reported as "1.0" and "2.0"
+BLANK_TEST_CSV = b"""student_id,test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+S1,1,Q1,Physics,Kinematics,easy,1,10
+S1,2,Q1,Physics,Optics,hard,0,20
+S1,,Q2,Maths,Algebra,medium,1,30
+"""
+
+# The blank is_correct cell makes the column float, so every 1.0 in it is scored incorrect
+BLANK_CORRECT_CSV = b"""student_id,test_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+S1,T1,Q1,Physics,Kinematics,easy,1,10
+S1,T1,Q2,Physics,Optics,hard,,20
+S1,T2,Q1,Maths,Algebra,medium,1,30
+"""
+
+# Without a test column the whole file is one test, reported as "Test 1"
+NO_TEST_CSV = b"""student_id,question_id,topic,subtopic,difficulty_level,is_correct,time_taken
+S1,Q1,Physics,Kinematics,easy,1,10
+S1,Q2,Physics,Optics,hard,0,20
+S1,Q3,Maths,Algebra,medium,yes,30
+"""
+
+
+@pytest.mark.parametrize(
+    "csv", [NUMERIC_TESTS_CSV, BLANK_TEST_CSV, BLANK_CORRECT_CSV, NO_TEST_CSV],
+    ids=["numeric_tests", "blank_test", "blank_correct", "no_test"],
+)
+def test_stored_analysis_matches_upload(client, csv):
+    uploaded = client.post("/api/upload", data={"file": (io.BytesIO(csv), "attempts.csv")})
+    assert uploaded.status_code == 200, uploaded.get_data(as_text=True)
+
+    with BulkLoader(app_module.db_pool.db_path) as loader:
+        loader.load_stream(io.BytesIO(csv))
+    stored = client.get("/api/students/S1/analysis")
+    assert stored.status_code == 200, stored.get_data(as_text=True)
+
+    assert stored.get_json()["analysis"] == uploaded.get_json()["analysis"]
+
+
+def test_numeric_test_ids_sort_as_numbers(client):
+    with BulkLoader(app_module.db_pool.db_path) as loader:
+        loader.load_stream(io.BytesIO(NUMERIC_TESTS_CSV))
+    progression = client.get("/api/students/S1/analysis").get_json()["analysis"]["strength_progression"]
+    assert [entry["test_id"] for entry in progression] == ["1", "2", "10"]
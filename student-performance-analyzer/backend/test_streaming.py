@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""Check StreamingAnalyzer's chunked tallies give the same result as analyze() on the whole file"""
+
+import gzip
+import io
+
+import pandas as pd
+import pytest
+
+from analyzer import PerformanceAnalyzer
+from benchmark import make_attempts
+from streaming import StreamingAnalyzer
+
+
+def attempts_csv() -> bytes:
+    df = make_attempts(2000, students=1, tests=7, subtopics=25).drop(columns="student_id")
+    # Rejected rows spread over several chunks, and a test id that only appears in the last chunk
+    df.loc[df.index[::97], "time_taken"] = -1
+    df.loc[df.index[5::101], "difficulty_level"] = "unknown"
+    df.loc[df.index[7::103], "subtopic"] = None
+    df.loc[df.index[-3:], "test_id"] = "T999"
+    return df.to_csv(index=False).encode()
+
+
+@pytest.mark.parametrize("chunksize", [97, 333, 5000])
+def test_chunked_csv_matches_analyze(chunksize):
+    csv = attempts_csv()
+    expected = PerformanceAnalyzer(pd.read_csv(io.BytesIO(csv))).analyze()
+    assert StreamingAnalyzer.from_csv(io.BytesIO(csv), chunksize=chunksize).result() == expected
+
+
+def test_gzip_upload_matches_analyze():
+    csv = attempts_csv()
+    expected = PerformanceAnalyzer(pd.read_csv(io.BytesIO(csv))).analyze()
+    streamed = StreamingAnalyzer.from_file(io.BytesIO(gzip.compress(csv)), "attempts.csv.gz", chunksize=500)
+    assert streamed.result() == expected
+
+
+def test_chunks_without_test_column_report_one_test():
+    df = pd.read_csv(io.BytesIO(attempts_csv())).drop(columns="test_id")
+    expected = PerformanceAnalyzer(df.copy()).analyze()
+    streamed = StreamingAnalyzer.from_chunks(df.iloc[start:start + 700] for start in range(0, len(df), 700))
+    result = streamed.result()
+    assert result == expected
+    assert [entry["test_id"] for entry in result["strength_progression"]] == ["Test 1"]
+
+
+def test_no_valid_rows_raises_like_analyze():
+    df = pd.read_csv(io.BytesIO(attempts_csv()))
+    df["time_taken"] = -1
+    with pytest.raises(ValueError) as expected:
+        PerformanceAnalyzer(df.copy()).analyze()
+    with pytest.raises(ValueError) as streamed:
+        StreamingAnalyzer.from_chunks([df.iloc[:1000], df.iloc[1000:]]).result()
+    assert str(streamed.value) == str(expected.value)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""Production entry point: a warmed-up app for any WSGI server.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:application   # WEB_WORKERS processes x WEB_THREADS threads
+    python wsgi.py                                  # waitress if installed, else a threaded werkzeug server
+
+Configured with WEB_HOST (default 0.0.0.0), WEB_PORT (5000), WEB_WORKERS (1), WEB_THREADS (8)
+and WEB_TIMEOUT (120 seconds). Every worker process warms up before it serves its first
+request. The result cache, upload jobs and sample response live in each process, so with
+WEB_WORKERS > 1 job polling and SSE requests must reach the worker that accepted the upload.
+"""
+
+import logging
+import os
+
+from flask import Flask
+
+logger = logging.getLogger(__name__)
+
+HOST = os.getenv('WEB_HOST', '0.0.0.0')
+PORT = int(os.getenv('WEB_PORT', '5000'))
+THREADS = int(os.getenv('WEB_THREADS', '8'))
+TIMEOUT = int(os.getenv('WEB_TIMEOUT', '120'))
+
+# Per-request debug logging is for development; LOG_LEVEL still overrides
+os.environ.setdefault('LOG_LEVEL', 'INFO')
+
+
+def create_app() -> Flask:
+    """The Flask app with debug off and its shared state warmed up (done once per process)"""
+    import app as application_module
+
+    flask_app = application_module.app
+    flask_app.debug = False
+    if not application_module.warmup_state['ready']:
+        application_module.warm_up()
+    return flask_app
+
+
+def serve(host: str = HOST, port: int = PORT, threads: int = THREADS) -> None:
+    """Serve in this process with a pool of `threads` request threads"""
+    flask_app = create_app()
+    try:
+        from waitress import serve as waitress_serve
+    except ImportError:
+        waitress_serve = None
+
+    if waitress_serve is not None:
+        logger.info(f"Serving on {host}:{port} with waitress ({threads} threads)")
+        waitress_serve(flask_app, host=host, port=port, threads=threads, channel_timeout=TIMEOUT)
+        return
+
+    from werkzeug.serving import make_server
+    # Without waitress: werkzeug's threaded server, one thread per connection (`threads` doesn't apply)
+    logger.warning("waitress is not installed; serving with werkzeug's threaded server")
+    make_server(host, port, flask_app, threaded=True).serve_forever()
+
+
+if __name__ == '__main__':
+    serve()
+else:
+    application = create_app()
@@ -10,8 +10,6 @@ const errorMessage = document.getElementById("errorMessage");
 const successMessage = document.getElementById("successMessage");
 
 let selectedFile = null;
-const API_BASE =
-  window.location.protocol === "file:" ? "http://127.0.0.1:5000" : "";
 
 function getDashboardUrl() {
   return window.location.protocol === "file:" ? "dashboard.html" : "/dashboard";
@@ -46,8 +44,9 @@ uploadArea.addEventListener("drop", (e) => {
 function handleFileSelect(file) {
   if (!file) return;
 
-  if (file.type !== "text/csv" && !file.name.endsWith(".csv")) {
-    showError("Please select a valid CSV file");
+  const supported = /\.(csv(\.gz|\.zst)?|parquet|pq|arrow|feather|ipc)$/i.test(file.name);
+  if (file.type !== "text/csv" && !supported) {
+    showError("Please select a valid CSV, Parquet or Arrow file");
     return;
   }
 
@@ -70,25 +69,26 @@ async function analyzeFile() {
     return;
   }
 
-  const formData = new FormData();
-  formData.append("file", selectedFile);
-
   showLoading(true);
   clearMessages();
 
+  // The dashboard uploads the file itself and draws each stage as it arrives
+  if (await savePendingUpload(selectedFile)) {
+    sessionStorage.removeItem("analysisData");
+    sessionStorage.setItem("pendingUpload", selectedFile.name);
+    window.location.href = getDashboardUrl();
+    return;
+  }
+
+  // Without IndexedDB the file can't reach the dashboard, so it is analyzed here first
   try {
-    const response = await fetch(`${API_BASE}/api/upload`, {
-      method: "POST",
-      body: formData,
+    const data = await uploadProgressively(selectedFile, (stage) => {
+      if (STAGE_MESSAGES[stage]) {
+        showSuccess(STAGE_MESSAGES[stage]);
+      }
     });
 
-    const data = await response.json();
-
-    if (!response.ok) {
-      throw new Error(data.error || "Analysis failed");
-    }
-
-    // Store data and redirect
+    sessionStorage.removeItem("pendingUpload");
     sessionStorage.setItem("analysisData", JSON.stringify(data));
     showSuccess("Analysis complete! Redirecting to dashboard...");
 
@@ -101,6 +101,11 @@ async function analyzeFile() {
   }
 }
 
+const STAGE_MESSAGES = {
+  analysis: "Analysis ready, building your study plan...",
+  plan: "Study plan ready, finishing up...",
+};
+
 async function loadSampleData() {
   showLoading(true);
   clearMessages();
@@ -109,6 +114,7 @@ async function loadSampleData() {
     const response = await fetch(`${API_BASE}/api/sample`);
     const data = await response.json();
 
+    sessionStorage.removeItem("pendingUpload");
     sessionStorage.setItem("analysisData", JSON.stringify(data));
     showSuccess("Sample data loaded! Redirecting to dashboard...");
 
@@ -5,6 +5,11 @@ let strengthChart = null;
 
 // Initialize dashboard
 document.addEventListener("DOMContentLoaded", () => {
+  if (sessionStorage.getItem("pendingUpload")) {
+    streamPendingUpload();
+    return;
+  }
+
   const data = sessionStorage.getItem("analysisData");
   if (!data) {
     window.location.href = "/";
@@ -15,12 +20,61 @@ document.addEventListener("DOMContentLoaded", () => {
   renderDashboard();
 });
 
+// Upload the file the upload page handed over and render each pipeline stage as it arrives:
+// the charts with the analysis, then the plan, materials and tips, then the GenAI outcome
+async function streamPendingUpload() {
+  analysisData = { success: true };
+  renderPendingGuidance();
+
+  try {
+    const file = await loadPendingUpload();
+    if (!file) {
+      throw new Error("the selected file is no longer available");
+    }
+    await uploadProgressively(file, (stage, data) => {
+      analysisData = data;
+      if (stage === "analysis") {
+        renderAnalysis();
+      } else if (stage === "plan") {
+        renderGuidance();
+      } else if (stage === "genai") {
+        // Applied GenAI output replaces the rule-based plan, materials and tips
+        renderGuidance();
+        renderGenaiStatus(analysisData.genai_status);
+      }
+    });
+    // Kept so a reload shows the finished analysis without uploading again
+    sessionStorage.setItem("analysisData", JSON.stringify(analysisData));
+    sessionStorage.removeItem("pendingUpload");
+    await clearPendingUpload();
+  } catch (error) {
+    sessionStorage.removeItem("pendingUpload");
+    clearPendingUpload().catch(() => {});
+    alert(`Analysis failed: ${error.message}`);
+    goBack();
+  }
+}
+
+function renderPendingGuidance() {
+  for (const id of ["studyPlan", "recommendations", "studyTips"]) {
+    document.getElementById(id).innerHTML = "<p>Preparing...</p>";
+  }
+}
+
 function renderDashboard() {
   if (!analysisData || !analysisData.analysis) {
     console.error("No analysis data found");
     return;
   }
 
+  renderAnalysis();
+  renderGuidance();
+
+  // Render GenAI status
+  renderGenaiStatus(analysisData.genai_status);
+}
+
+function renderAnalysis() {
   const analysis = analysisData.analysis;
   const summary = analysis.summary;
 
@@ -39,7 +93,9 @@ function renderDashboard() {
   renderSummaryDetails(summary);
   renderSubtopicRanking(analysis.subtopic_ranking);
   renderRevisionSummary(analysisData.revision_summary, analysis);
+}
 
+function renderGuidance() {
   // Render 7-day plan
   renderStudyPlan(analysisData.plan);
 
@@ -48,9 +104,6 @@ function renderDashboard() {
 
   // Render study tips
   renderStudyTips(analysisData.study_tips);
-
-  // Render GenAI status
-  renderGenaiStatus(analysisData.genai_status);
 }
 
 function renderGenaiStatus(genaiStatus) {
@@ -101,6 +154,7 @@ function renderAccuracyChart(accuracyByDifficulty) {
     score < 50 ? "#e74c3c" : score < 70 ? "#f39c12" : "#2ecc71",
   );
 
+  if (accuracyChart) accuracyChart.destroy();
   accuracyChart = new Chart(ctx, {
     type: "bar",
     data: {
@@ -148,6 +202,7 @@ function renderTimeChart(timeComparison) {
     timeComparison.avg_time_incorrect,
   ];
 
+  if (timeChart) timeChart.destroy();
   timeChart = new Chart(ctx, {
     type: "bar",
     data: {
@@ -186,6 +241,7 @@ function renderStrengthChart(strengthProgression) {
   const labels = strengthProgression.map((item) => item.test_id);
   const scores = strengthProgression.map((item) => item.strength_score);
 
+  if (strengthChart) strengthChart.destroy();
   strengthChart = new Chart(ctx, {
     type: "line",
     data: {
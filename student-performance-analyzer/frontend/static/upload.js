@@ -0,0 +1,112 @@
+// Progressive upload shared by the upload page and the dashboard
+const API_BASE =
+  window.location.protocol === "file:" ? "http://127.0.0.1:5000" : "";
+
+const PENDING_UPLOAD_DB = "student-performance-analyzer";
+const PENDING_UPLOAD_STORE = "uploads";
+const PENDING_UPLOAD_KEY = "pending";
+
+// Upload a file with ?progressive=true, calling onStage(stage, data) as each stage line arrives
+// with the response merged so far; resolves with the full response once the `done` line arrives
+async function uploadProgressively(file, onStage) {
+  const formData = new FormData();
+  formData.append("file", file);
+
+  // One streamed request, so any worker process can serve it; each stage arrives as it finishes
+  const response = await fetch(`${API_BASE}/api/upload?progressive=true`, {
+    method: "POST",
+    body: formData,
+  });
+
+  if (!response.ok) {
+    const data = await response.json();
+    throw new Error(data.error || "Analysis failed");
+  }
+
+  return readUploadStages(response, onStage);
+}
+
+// Merge the NDJSON stage lines of a ?progressive=true upload into the normal response
+async function readUploadStages(response, onStage) {
+  const data = { success: true };
+  let done = false;
+
+  const applyLine = (line) => {
+    if (!line.trim()) return;
+    const message = JSON.parse(line);
+    if (message.stage === "error") {
+      throw new Error(message.error || "Analysis failed");
+    }
+    if (message.stage === "done") {
+      done = true;
+      return;
+    }
+    Object.assign(data, message.data);
+    onStage(message.stage, data);
+  };
+
+  if (response.body && window.TextDecoder) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = "";
+    for (;;) {
+      const { value, done: finished } = await reader.read();
+      buffered += decoder.decode(value || new Uint8Array(), { stream: !finished });
+      const lines = buffered.split("\n");
+      buffered = lines.pop();
+      lines.forEach(applyLine);
+      if (finished) break;
+    }
+    applyLine(buffered);
+  } else {
+    (await response.text()).split("\n").forEach(applyLine);
+  }
+
+  if (!done) {
+    throw new Error("Connection closed before the analysis finished");
+  }
+  return data;
+}
+
+// The selected file is handed to the dashboard through IndexedDB, which can hold a File
+// (sessionStorage only holds strings), so the dashboard can open before the analysis is done
+function pendingUploadRequest(mode, operation) {
+  return new Promise((resolve, reject) => {
+    const opened = indexedDB.open(PENDING_UPLOAD_DB, 1);
+    opened.onupgradeneeded = () => opened.result.createObjectStore(PENDING_UPLOAD_STORE);
+    opened.onerror = () => reject(opened.error);
+    opened.onsuccess = () => {
+      const db = opened.result;
+      const transaction = db.transaction(PENDING_UPLOAD_STORE, mode);
+      const request = operation(transaction.objectStore(PENDING_UPLOAD_STORE));
+      transaction.oncomplete = () => {
+        db.close();
+        resolve(request.result);
+      };
+      transaction.onerror = transaction.onabort = () => {
+        db.close();
+        reject(transaction.error);
+      };
+    };
+  });
+}
+
+// Resolves to false where IndexedDB is unavailable (e.g. some private windows)
+async function savePendingUpload(file) {
+  if (!window.indexedDB) return false;
+  try {
+    await pendingUploadRequest("readwrite", (store) => store.put(file, PENDING_UPLOAD_KEY));
+    return true;
+  } catch (error) {
+    console.warn("Could not hand the upload to the dashboard:", error);
+    return false;
+  }
+}
+
+function loadPendingUpload() {
+  return pendingUploadRequest("readonly", (store) => store.get(PENDING_UPLOAD_KEY));
+}
+
+function clearPendingUpload() {
+  return pendingUploadRequest("readwrite", (store) => store.delete(PENDING_UPLOAD_KEY));
+}